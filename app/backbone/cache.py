@@ -0,0 +1,249 @@
+"""Process-local cache of the predictables catalog and of the counts,
+invalidated by table versions, plus a bounded in-memory cache of the icons.
+
+Every write function bumps the version of the table it writes to, and a cached
+catalog or count is reloaded as soon as the version of its table (or of the table
+it's filtered by) changed. Since each worker has its own cache, they are also
+reloaded after `ST.catalog_ttl` seconds, to pick up other workers' writes.
+"""
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from itertools import islice
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Hashable, TypeVar
+
+from sqlalchemy import select
+
+from backbone.config import ST
+from backbone.exceptions import ItemNotFoundException, ValidationException
+from backbone.options import ENDPOINTS as EP
+from backbone.options import TABLE_NAMES as TN
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import TableName
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+WITH_CHARACTER_IFK: set["TableName"] = {TN.PERKS, TN.STATUS}
+"""Tables whose items are served along with their character's ifk."""
+
+MAX_CACHED_COUNTS = 1_024
+
+T = TypeVar("T")
+
+_versions: defaultdict["TableName", int] = defaultdict(int)
+_versions_lock = Lock()
+
+
+def bump_version(tname: "TableName") -> None:
+    """Invalidate everything cached from the table."""
+    with _versions_lock:
+        _versions[tname] += 1
+
+
+def get_version(tname: "TableName") -> int:
+    return _versions[tname]
+
+
+@dataclass
+class Catalog:
+    """All the items of a table, ordered by id, along with the ifk of their type."""
+
+    versions: tuple[int, ...]
+    loaded_at: float
+    items: dict[int, dict]
+    mt_ifks: dict[int, bool | None]
+
+    def is_fresh(self, versions: tuple[int, ...]) -> bool:
+        return (
+            self.versions == versions
+            and monotonic() - self.loaded_at < ST.catalog_ttl
+        )
+
+
+_catalogs: dict[tuple["TableName", "TableName | None"], Catalog] = {}
+
+
+def catalog_versions(model, mt_type) -> tuple[int, ...]:
+    tnames = [model.__tablename__]
+    if mt_type is not None:
+        tnames.append(mt_type.__tablename__)
+    return tuple(get_version(tn) for tn in tnames)
+
+
+async def get_catalog(adb: "AsyncSession", model, mt_type=None) -> Catalog:
+    """Get the cached catalog of the model, loading it if it's missing or stale.
+    'mt_type' is the model whose ifk is used to filter the items, if any.
+    """
+    key = (
+        model.__tablename__,
+        mt_type.__tablename__ if mt_type is not None else None,
+    )
+    # Versions must be read before loading, so that a concurrent write
+    # makes the loaded catalog stale instead of being missed
+    versions = catalog_versions(model, mt_type)
+    catalog = _catalogs.get(key)
+    if catalog is not None and catalog.is_fresh(versions):
+        return catalog
+
+    cols = list(model.__table__.columns)
+    if mt_type is not None:
+        stmt = select(*cols, mt_type.ifk.label("mt_ifk")).join(mt_type)
+    else:
+        stmt = select(*cols)
+    rows = (await adb.execute(stmt.order_by(model.id))).mappings().all()
+
+    with_ifk = model.__tablename__ in WITH_CHARACTER_IFK
+    items, mt_ifks = {}, {}
+    for row in rows:
+        item = {c.key: row[c.key] for c in cols}
+        mt_ifks[item["id"]] = row["mt_ifk"] if mt_type is not None else None
+        if with_ifk:
+            item["ifk"] = mt_ifks[item["id"]]
+        items[item["id"]] = item
+
+    catalog = Catalog(versions, monotonic(), items, mt_ifks)
+    _catalogs[key] = catalog
+    return catalog
+
+
+async def fetch_one_cached(
+    adb: "AsyncSession",
+    model,
+    id: int,
+    model_str: str | None = None,
+    mt_type=None,
+) -> dict:
+    """Cached version of `filter_one`, that only returns the item."""
+    assert id >= 0, "ID can't be negative"
+    catalog = await get_catalog(adb, model, mt_type)
+    item = catalog.items.get(id)
+    if item is None:
+        item_type = (
+            model_str if model_str is not None
+            else model.__tablename__.capitalize()
+        )
+        raise ItemNotFoundException(item_type, id)
+    return item
+
+
+async def fetch_many_cached(
+    adb: "AsyncSession",
+    model,
+    ids: list[int],
+    mt_type=None,
+) -> dict:
+    """Bulk version of `fetch_one_cached`. Items are returned in the order of `ids`,
+    and the ids that weren't found are reported instead of raising.
+    """
+    if len(ids) > EP.MAX_BULK_IDS:
+        raise ValidationException(f"Can't request more than {EP.MAX_BULK_IDS} ids at once")
+    catalog = await get_catalog(adb, model, mt_type)
+    return {
+        "items": [catalog.items[id] for id in ids if id in catalog.items],
+        "missing": [id for id in dict.fromkeys(ids) if id not in catalog.items],
+    }
+
+
+def _soft_bool_match(value: bool | None, cond: bool | None) -> bool:
+    """Python counterpart of `sqla.soft_bool_filter`."""
+    return value is None or value is cond
+
+
+async def get_many_cached(
+    adb: "AsyncSession",
+    limit: int,
+    model,
+    skip: int = 0,
+    ifk: bool | None = None,
+    mt_type=None,
+    text: str = "",
+) -> list[dict]:
+    """Cached version of `get_many`, with the same filters as `sqla.filter_items`."""
+    assert limit > 0
+    assert skip >= 0
+
+    catalog = await get_catalog(adb, model, mt_type)
+    items = catalog.items.values()
+
+    if (mt_type is not None) and (ifk is not None):
+        items = (it for it in items if _soft_bool_match(catalog.mt_ifks[it["id"]], ifk))
+    elif model.__tablename__ == TN.CHARACTER:
+        items = (it for it in items if _soft_bool_match(it["ifk"], ifk))
+
+    if text != "":
+        text = text.lower()
+        items = (it for it in items if text in it["name"].lower())
+
+    return list(islice(items, skip, skip + limit))
+
+
+# * Counts
+
+
+_counts: dict[Hashable, tuple[tuple[int, ...], float, object]] = {}
+_counts_lock = Lock()
+
+
+def get_cached_count(
+    key: Hashable,
+    tnames: list["TableName"],
+    count_f: Callable[[], T],
+) -> T:
+    """Get a count (or a set of counts) from the cache, or compute it with 'count_f'
+    if it's missing or if any of the tables it depends on ('tnames') was written to.
+    Cached values are shared, so they must not be mutated.
+    """
+    versions = tuple(get_version(tn) for tn in tnames)
+    cached = _counts.get(key)
+    if (
+        cached is not None
+        and cached[0] == versions
+        and monotonic() - cached[1] < ST.catalog_ttl
+    ):
+        return cached[2]
+
+    count = count_f()
+    with _counts_lock:
+        if key not in _counts and len(_counts) >= MAX_CACHED_COUNTS:
+            _counts.pop(next(iter(_counts), None), None)  # oldest
+        _counts[key] = (versions, monotonic(), count)
+    return count
+
+
+# * Icons
+
+
+class BytesLRU:
+    """Least recently used cache of bytes, bounded by their total size."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+
+icons_lru = BytesLRU(ST.icons_cache_bytes)
+"""Icon bytes keyed by (path, mtime), so that a replaced icon is never served stale."""
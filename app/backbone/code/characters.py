@@ -2,50 +2,64 @@
 
 from typing import TYPE_CHECKING, Optional
 
-from backbone.endpoints import postr
-from backbone.options import ENDPOINTS as EP
+from dbdie_classes.schemas.predictables import AddonCreate, ItemCreate, PerkCreate
+
+from backbone.services import insert_addon, insert_item, insert_perk
+from backbone.sqla import object_as_dict
 
 if TYPE_CHECKING:
     from dbdie_classes.base import LabelName
+    from sqlalchemy.orm import Session
 
 ADDON_TYPE_ID = 1
 
 
-def create_killer_power(character: dict, power_name: Optional["LabelName"]) -> dict | None:
+def create_killer_power(
+    db: "Session",
+    character: dict,
+    power_name: Optional["LabelName"],
+) -> dict | None:
     """Killer power creation for use in FullCharacterCreate."""
     return (
         None if power_name is None
-        else postr(
-            EP.ITEM,
-            json={
-                "name": power_name,
-                "type_id": 1,  # * Killer power id
-                "dbdv_id": character["dbdv_id"],
-                "rarity_id": None,
-            },
+        else object_as_dict(
+            insert_item(
+                db,
+                ItemCreate(
+                    name=power_name,
+                    type_id=1,  # * Killer power id
+                    dbdv_id=character["dbdv_id"],
+                    rarity_id=None,
+                ),
+            )
         )
     )
 
 
-def create_perks(character: dict, perk_names: list["LabelName"]) -> list[dict]:
+def create_perks(
+    db: "Session",
+    character: dict,
+    perk_names: list["LabelName"],
+) -> list[dict]:
     """Perks creation for use in FullCharacterCreate."""
     perks = []
     for perk_name in perk_names:
-        p = postr(
-            EP.PERKS,
-            json={
-                "name": perk_name,
-                "character_id": character["id"],
-                "dbdv_id": character["dbdv_id"],
-                "emoji": None,
-            },
+        p = insert_perk(
+            db,
+            PerkCreate(
+                name=perk_name,
+                character_id=character["id"],
+                dbdv_id=character["dbdv_id"],
+                emoji=None,
+            ),
         )
-        perks.append(p)
+        perks.append(p._asdict())
 
     return perks
 
 
 def create_addons(
+    db: "Session",
     character: dict,
     addon_names: list["LabelName"] | None,
     power_id: int | None,
@@ -56,16 +70,16 @@ def create_addons(
     else:
         addons = []
         for addon_name in addon_names:
-            a = postr(
-                EP.ADDONS,
-                json={
-                    "name": addon_name,
-                    "type_id": ADDON_TYPE_ID,
-                    "dbdv_id": character["dbdv_id"],
-                    "item_id": power_id,
-                    "rarity_id": None,
-                },
+            a = insert_addon(
+                db,
+                AddonCreate(
+                    name=addon_name,
+                    type_id=ADDON_TYPE_ID,
+                    dbdv_id=character["dbdv_id"],
+                    item_id=power_id,
+                    rarity_id=None,
+                ),
             )
-            addons.append(a)
+            addons.append(object_as_dict(a))
 
     return addons
@@ -0,0 +1,243 @@
+"""Extra code for the export and streaming endpoints of labels and matches."""
+
+import csv
+import io
+import zipfile
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Literal
+
+from dbdie_classes.code.groupings import (
+    labels_model_to_checks,
+    labels_model_to_labeled_predictables,
+)
+from dbdie_classes.schemas.groupings import ManualChecksIn
+from fastapi.responses import StreamingResponse
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, SmallInteger, func, select
+
+from backbone.code.labels import additional_filters
+from backbone.database import SessionLocal
+from backbone.models.groupings import Labels, Match
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import IsForKiller
+    from sqlalchemy import Row, Select
+
+ExportFormat = Literal["parquet", "arrow", "npz"]
+StreamFormat = Literal["ndjson", "csv"]
+
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "npz": "application/octet-stream",
+}
+NPZ_NULL = -1
+
+STREAM_CHUNK_ROWS = 1_000
+STREAM_MEDIA_TYPES: dict[StreamFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_cols() -> list:
+    return (
+        [Labels.match_id, Labels.player_id]
+        + labels_model_to_labeled_predictables(Labels)
+        + [Labels.user_id, Labels.extr_id]
+        + labels_model_to_checks(Labels)
+    )
+
+
+def arrow_type(col) -> pa.DataType:
+    if isinstance(col.type, Boolean):
+        return pa.bool_()
+    elif isinstance(col.type, SmallInteger):
+        return pa.int16()
+    return pa.int32()
+
+
+def npy_dtype(col) -> np.dtype:
+    """Smallest signed dtype for the column, so that nulls can be encoded as -1."""
+    if isinstance(col.type, Boolean):
+        return np.dtype(np.int8)
+    elif isinstance(col.type, SmallInteger):
+        return np.dtype(np.int16)
+    return np.dtype(np.int32)
+
+
+def export_select(
+    ifk: "IsForKiller",
+    manual_checks: ManualChecksIn | None,
+    extr_id: int | None,
+    dbdv_id: int | None,
+) -> "Select":
+    """Select the exported labels columns, with the same filters as `/labels/filter-many`
+    plus the extractor and the DBD version of the match.
+    """
+    stmt = additional_filters(select(*export_cols()), ifk, manual_checks)
+    if extr_id is not None:
+        stmt = stmt.where(Labels.extr_id == extr_id)
+    if dbdv_id is not None:
+        stmt = stmt.join(Match, Match.id == Labels.match_id).where(Match.dbdv_id == dbdv_id)
+    return stmt.order_by(Labels.match_id, Labels.player_id)
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file whose written bytes are drained in chunks,
+    so that a file writer can be streamed.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_partitions(stmt: "Select", chunk_rows: int) -> Iterator[list]:
+    """Iterate over the rows in partitions, with a server-side cursor.
+    It uses its own session, since it outlives the request's one when streamed.
+    """
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=chunk_rows))
+        yield from result.partitions()
+
+
+def iter_arrow(
+    stmt: "Select",
+    parquet: bool,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Stream the rows as Parquet (a row group per chunk) or as an Arrow IPC stream."""
+    cols = export_cols()
+    schema = pa.schema([(c.key, arrow_type(c)) for c in cols])
+
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+    for rows in iter_partitions(stmt, chunk_rows):
+        writer.write_batch(
+            pa.RecordBatch.from_arrays(
+                [pa.array(values, type=f.type) for f, values in zip(schema, zip(*rows))],
+                schema=schema,
+            )
+        )
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def npy_header(dtype: np.dtype, n: int) -> bytes:
+    """Header of a .npy file with a 1D array of 'n' items."""
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        buf,
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (n,),
+        },
+    )
+    return buf.getvalue()
+
+
+def iter_npz(stmt: "Select", chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream the rows as a .npz with an array per column, with -1 for nulls.
+    Each .npy is written as it's read, with one query per column, so all of them
+    run in a single REPEATABLE READ transaction to see the same rows.
+    """
+    with SessionLocal() as db:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        n = db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+        sink = ChunkSink()
+        with zipfile.ZipFile(sink, "w") as zf:
+            for c in export_cols():
+                dtype = npy_dtype(c)
+                with zf.open(f"{c.key}.npy", "w", force_zip64=True) as f:
+                    f.write(npy_header(dtype, n))
+                    result = db.execute(
+                        stmt.with_only_columns(c).execution_options(yield_per=chunk_rows)
+                    )
+                    for values in result.scalars().partitions():
+                        f.write(
+                            np.array(
+                                [NPZ_NULL if v is None else v for v in values],
+                                dtype=dtype,
+                            ).tobytes()
+                        )
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+
+
+def export_labels_response(file_format: ExportFormat, stmt: "Select") -> StreamingResponse:
+    content = (
+        iter_npz(stmt) if file_format == "npz"
+        else iter_arrow(stmt, parquet=file_format == "parquet")
+    )
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="labels.{file_format}"'},
+    )
+
+
+# * Row streams
+
+
+def iter_ndjson(
+    stmt: "Select",
+    to_dict: Callable[["Row"], dict],
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Stream the rows as newline-delimited JSON, converting each one with 'to_dict'."""
+    for rows in iter_partitions(stmt, chunk_rows):
+        yield b"".join(
+            orjson.dumps(to_dict(row), option=orjson.OPT_APPEND_NEWLINE) for row in rows
+        )
+
+
+def iter_csv(stmt: "Select", chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream the rows as CSV. The header is sent before running the query."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(stmt.selected_columns.keys())
+    yield buffer.getvalue().encode()
+
+    for rows in iter_partitions(stmt, chunk_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def stream_rows_response(
+    file_format: StreamFormat,
+    stmt: "Select",
+    to_dict: Callable[["Row"], dict],
+) -> StreamingResponse:
+    """Stream the rows of the statement in constant memory, as NDJSON or CSV.
+    In NDJSON each row is converted with 'to_dict', while CSV keeps the flat rows.
+    """
+    content = iter_csv(stmt) if file_format == "csv" else iter_ndjson(stmt, to_dict)
+    return StreamingResponse(content, media_type=STREAM_MEDIA_TYPES[file_format])
@@ -1,29 +1,102 @@
 """Extra code for /extract endpoint."""
 
-from fastapi import status
-from fastapi.exceptions import HTTPException
+import json
+from typing import TYPE_CHECKING, Iterable, Iterator
 
-from backbone.endpoints import getr
-from backbone.options import ENDPOINTS as EP
+from backbone.code.labels import bulk_update_labels_strict
+from backbone.endpoints import get_id
+from backbone.jobs import raise_if_cancelled
+from backbone.models.objects import Extractor
+from backbone.schemas import LabelsBulkReport
 
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType
+    from requests import Response
+    from sqlalchemy.orm import Session
 
-def get_extr_id(extr_name: str) -> int:
+Prediction = tuple[int, int, int | None, int]
+
+
+def get_extr_id(db: "Session", extr_name: str) -> int:
     """Get extractor id."""
-    try:
-        extr_id = getr(f"{EP.EXTRACTOR}/id", params={"extr_name": extr_name})
-    except HTTPException as e:
-        if e.status_code == status.HTTP_404_NOT_FOUND:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Extractor '{extr_name}' was not found",
-            ) from e
-    return extr_id
+    return get_id(db, Extractor, "Extractor", extr_name)
 
 
 def get_zip(d: dict):
     """Get zip for prediction iteration."""
     item_ids = (
-        d["item_ids"] if d["item_ids"] is not None
+        d["item_ids"] if d.get("item_ids") is not None
         else len(d["match_ids"]) * [None]
     )
     return zip(d["match_ids"], d["player_ids"], item_ids, d["preds"])
+
+
+# * Streamed extraction
+
+
+def iter_ndjson(resp: "Response") -> Iterator[dict]:
+    """Iterate the records of an NDJSON streamed Response as they arrive."""
+    for line in resp.iter_lines():
+        if line:
+            yield json.loads(line)
+
+
+def chunk_preds(
+    records: Iterable[dict],
+    chunk_size: int,
+) -> Iterator[tuple["FullModelType", list[Prediction]]]:
+    """Buffer the predictions of each record by fmt, and yield them in chunks
+    of `chunk_size`. Each record has the same format as a value of the
+    non-streamed extraction response, plus its 'fmt' key.
+    """
+    assert chunk_size > 0
+
+    buffers: dict["FullModelType", list[Prediction]] = {}
+    for record in records:
+        buffer = buffers.setdefault(record["fmt"], [])
+        buffer.extend(get_zip(record))
+        while len(buffer) >= chunk_size:
+            yield record["fmt"], buffer[:chunk_size]
+            del buffer[:chunk_size]
+
+    for fmt, buffer in buffers.items():
+        if buffer:
+            yield fmt, buffer
+
+
+def merge_reports(
+    reports: dict["FullModelType", LabelsBulkReport],
+    new_report: LabelsBulkReport,
+) -> None:
+    """Accumulate a bulk labels report into the reports of its fmt."""
+    if new_report.fmt not in reports:
+        reports[new_report.fmt] = new_report
+        return
+    report = reports[new_report.fmt]
+    report.rows += new_report.rows
+    report.updated += new_report.updated
+    report.batches += new_report.batches
+
+
+def apply_streamed_preds(
+    db: "Session",
+    resp: "Response",
+    extr_id: int,
+    chunk_size: int,
+) -> list[LabelsBulkReport]:
+    """Apply the streamed predictions to the labels table in bounded chunks,
+    each one in its own transaction, while the ML API keeps on extracting.
+    """
+    reports = {}
+    with resp:
+        for fmt, chunk in chunk_preds(iter_ndjson(resp), chunk_size):
+            report = bulk_update_labels_strict(
+                db,
+                fmt,
+                chunk,
+                user_id=1,  # TODO
+                extr_id=extr_id,
+            )
+            merge_reports(reports, report)
+            raise_if_cancelled()
+    return list(reports.values())
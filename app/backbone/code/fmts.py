@@ -0,0 +1,80 @@
+"""Extra code for the '/fmt' endpoint."""
+
+from typing import TYPE_CHECKING
+
+from dbdie_classes.options import MODEL_TYPE as MT
+from dbdie_classes.options.FMT import from_fmt
+from sqlalchemy import func, literal, select, union_all
+
+from backbone.cache import get_cached_count
+from backbone.exceptions import ValidationException
+from backbone.models.predictables import (
+    Addon,
+    AddonType,
+    Character,
+    Item,
+    ItemType,
+    Offering,
+    OfferingType,
+    Perk,
+    Status,
+)
+from backbone.sqla import join_and_filter_ifk
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import FullModelType, ModelType, TableName
+    from sqlalchemy import Select
+    from sqlalchemy.orm import Session
+
+MT_TO_COUNT_MODELS: dict["ModelType", tuple] = {
+    MT.ADDONS: (Addon, AddonType),
+    MT.CHARACTER: (Character, None),
+    MT.ITEM: (Item, ItemType),
+    MT.OFFERING: (Offering, OfferingType),
+    MT.PERKS: (Perk, None),
+    MT.STATUS: (Status, None),
+}
+"""Model and model-type type counted by each predictable's '/count' endpoint."""
+
+
+def count_models(fmt: "FullModelType") -> tuple:
+    mt, _, ifk = from_fmt(fmt)
+    if mt not in MT_TO_COUNT_MODELS:
+        raise ValidationException(f"Full model type '{fmt}' can't be counted.")
+    model, mt_type = MT_TO_COUNT_MODELS[mt]
+    return model, mt_type, ifk
+
+
+def fmts_count_select(fmts: list["FullModelType"]) -> "Select":
+    """Count the classes of every fmt in a single UNION ALL query,
+    with the same filters as the '/count' endpoint of each predictable.
+    """
+    parts = []
+    for fmt in fmts:
+        model, mt_type, ifk = count_models(fmt)
+        stmt = select(literal(fmt).label("fmt"), func.count().label("total"))
+        parts.append(join_and_filter_ifk(stmt.select_from(model), model, mt_type, ifk))
+    return union_all(*parts)
+
+
+def count_fmts_classes(
+    db: "Session",
+    fmts: list["FullModelType"],
+) -> dict["FullModelType", int]:
+    """Total classes of each fmt, cached until the next write to their tables."""
+    fmts = list(dict.fromkeys(fmts))
+    if not fmts:
+        return {}
+
+    tnames: list["TableName"] = []
+    for fmt in fmts:
+        model, mt_type, _ = count_models(fmt)
+        tnames.append(model.__tablename__)
+        if mt_type is not None:
+            tnames.append(mt_type.__tablename__)
+
+    return get_cached_count(
+        ("fmt_counts", tuple(fmts)),
+        list(dict.fromkeys(tnames)),
+        lambda: {fmt: total for fmt, total in db.execute(fmts_count_select(fmts))},
+    )
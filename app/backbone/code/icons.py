@@ -0,0 +1,129 @@
+"""Extra code for the icons atlas endpoints."""
+
+import hashlib
+import json
+import math
+import os
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from PIL import Image
+
+from backbone.endpoints import get_image
+from constants import ICONS_FOLDER
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import Endpoint
+    from fastapi import Request, Response
+
+ATLAS_FD = os.path.join(ICONS_FOLDER, ".atlas")
+
+_atlas_locks: dict["Endpoint", Lock] = {}
+_atlas_locks_lock = Lock()
+
+
+def atlas_paths(endpoint: "Endpoint") -> tuple[str, str]:
+    """Paths of the atlas image and of its JSON index."""
+    return (
+        os.path.join(ATLAS_FD, f"{endpoint}.png"),
+        os.path.join(ATLAS_FD, f"{endpoint}.json"),
+    )
+
+
+def list_icons(endpoint: "Endpoint") -> list[tuple[int, os.stat_result]]:
+    """Ids and file stats of the icons of a predictable type, sorted by id."""
+    fd = os.path.join(ICONS_FOLDER, endpoint)
+    assert os.path.isdir(fd), f"Icons folder '{endpoint}' doesn't exist."
+
+    icons = []
+    with os.scandir(fd) as it:
+        for entry in it:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".png" and stem.isdigit():
+                icons.append((int(stem), entry.stat()))
+    return sorted(icons, key=lambda t: t[0])
+
+
+def folder_fingerprint(icons: list[tuple[int, os.stat_result]]) -> str:
+    """Hash of the icons' names, sizes and mtimes, which changes with the folder contents."""
+    h = hashlib.sha1()
+    for id, stat in icons:
+        h.update(f"{id}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def read_index(index_path: str) -> dict | None:
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_icon(path: str) -> Image.Image:
+    with Image.open(path) as img:
+        return img.convert("RGBA")
+
+
+def build_atlas(
+    endpoint: "Endpoint",
+    icons: list[tuple[int, os.stat_result]],
+    fingerprint: str,
+) -> dict:
+    """Pack the icons in a grid of equally sized cells, and save the atlas and its index.
+    The index is written last, so a matching fingerprint means the atlas is complete.
+    """
+    fd = os.path.join(ICONS_FOLDER, endpoint)
+    imgs = {id: load_icon(os.path.join(fd, f"{id}.png")) for id, _ in icons}
+
+    cell_w = max((img.width for img in imgs.values()), default=0)
+    cell_h = max((img.height for img in imgs.values()), default=0)
+    cols = max(math.ceil(math.sqrt(len(imgs))), 1)
+    rows = math.ceil(len(imgs) / cols)
+
+    atlas = Image.new("RGBA", (max(cols * cell_w, 1), max(rows * cell_h, 1)))
+    rects = {}
+    for i, (id, img) in enumerate(imgs.items()):
+        x, y = (i % cols) * cell_w, (i // cols) * cell_h
+        atlas.paste(img, (x, y))
+        rects[id] = {"x": x, "y": y, "w": img.width, "h": img.height}
+
+    index = {
+        "fingerprint": fingerprint,
+        "width": atlas.width,
+        "height": atlas.height,
+        "icons": rects,
+    }
+
+    os.makedirs(ATLAS_FD, exist_ok=True)
+    img_path, index_path = atlas_paths(endpoint)
+    atlas.save(f"{img_path}.tmp", format="PNG", optimize=True)
+    os.replace(f"{img_path}.tmp", img_path)
+    with open(f"{index_path}.tmp", "w") as f:
+        json.dump(index, f)
+    os.replace(f"{index_path}.tmp", index_path)
+
+    return index
+
+
+def get_atlas_index(endpoint: "Endpoint") -> dict:
+    """Get the index of the icons atlas of a predictable type,
+    (re)building the atlas if the icons folder changed since it was built.
+    """
+    with _atlas_locks_lock:
+        lock = _atlas_locks.setdefault(endpoint, Lock())
+
+    with lock:
+        icons = list_icons(endpoint)
+        fingerprint = folder_fingerprint(icons)
+        _, index_path = atlas_paths(endpoint)
+        index = read_index(index_path)
+        if index is None or index["fingerprint"] != fingerprint:
+            index = build_atlas(endpoint, icons, fingerprint)
+    return index
+
+
+def get_atlas_image(endpoint: "Endpoint", request: "Request") -> "Response":
+    """Get the icons atlas image of a predictable type."""
+    get_atlas_index(endpoint)
+    return get_image(endpoint, f"{endpoint}.png", "Icons atlas", ATLAS_FD, request=request)
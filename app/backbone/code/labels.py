@@ -1,21 +1,35 @@
 """Extra code for the '/labels' endpoint."""
 
-from typing import TYPE_CHECKING
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable
 
 from fastapi import status
 from fastapi.exceptions import HTTPException
 import os
 import pandas as pd
+from sqlalchemy import column, func, literal, select, text, union_all, update, values
 
+from dbdie_classes.code.groupings import (
+    labels_model_to_checks,
+    labels_model_to_labeled_predictables,
+)
 from dbdie_classes.options.FMT import from_fmt
+from dbdie_classes.options.MODEL_TYPE import MULTIPLE_PER_PLAYER
 from dbdie_classes.options.SQL_COLS import MT_TO_COLS
 from dbdie_classes.paths import LABELS_FD_RP, absp
 from dbdie_classes.schemas.groupings import ManualChecksIn
 
-from backbone.endpoints import getr, postr
-from backbone.models.groupings import Labels
-from backbone.options import ENDPOINTS as EP
-from backbone.sqla import fill_cols_custom, soft_bool_filter
+from backbone.cache import bump_version, get_cached_count
+from backbone.endpoints import get_ids
+from backbone.models.groupings import Labels, Match
+from backbone.options import TABLE_NAMES as TN
+from backbone.schemas import LabelsBulkReport
+from backbone.sqla import (
+    copy_to_staging,
+    estimate_count,
+    fill_cols_custom,
+    soft_bool_filter,
+)
 
 if TYPE_CHECKING:
     from dbdie_classes.base import (
@@ -25,6 +39,7 @@ if TYPE_CHECKING:
         ModelType,
         SQLColumn,
     )
+    from sqlalchemy import Select
     from sqlalchemy.orm import Session
 
 
@@ -92,28 +107,146 @@ def player_to_labels(player: dict) -> dict:
     return labels
 
 
-def get_filtered_query(
+def labels_out_cols() -> list:
+    """Columns needed to build a `LabelsOut`."""
+    return (
+        [
+            Labels.match_id,
+            Labels.player_id,
+            Labels.date_modified,
+            Labels.user_id,
+            Labels.extr_id,
+        ]
+        + labels_model_to_labeled_predictables(Labels)
+        + labels_model_to_checks(Labels)
+    )
+
+
+def get_filtered_cols(
     ifk: "IsForKiller",
     manual_checks: ManualChecksIn | None,
     default_cols: list,
     force_prepend_default_cols: bool,
-    db: "Session",
-):
+) -> list:
     options = [(Labels.player_id, ifk)]
     if manual_checks is not None and manual_checks.is_init:
         options += manual_checks.get_filters_conds(Labels)
 
-    cols = fill_cols_custom(
+    return fill_cols_custom(
         options,
         default_cols=default_cols,
         force_prepend_default_col=force_prepend_default_cols,
     )
+
+
+def get_filtered_query(
+    ifk: "IsForKiller",
+    manual_checks: ManualChecksIn | None,
+    default_cols: list,
+    force_prepend_default_cols: bool,
+    db: "Session",
+):
+    cols = get_filtered_cols(ifk, manual_checks, default_cols, force_prepend_default_cols)
     query = db.query(*cols)
     query = additional_filters(query, ifk, manual_checks)
 
     return query
 
 
+def do_count_labels(
+    db: "Session",
+    ifk: "IsForKiller",
+    manual_checks: ManualChecksIn | None,
+    estimate: bool = False,
+) -> int:
+    """Count labels with a direct `SELECT count(*)`, cached until the next labels write.
+    If 'estimate' and there are no filters, the planner's estimate is returned instead.
+    """
+    has_checks = manual_checks is not None and manual_checks.is_init
+    if estimate and ifk is None and not has_checks:
+        n = estimate_count(db, TN.LABELS)
+        if n is not None:
+            return n
+
+    stmt = additional_filters(select(func.count()).select_from(Labels), ifk, manual_checks)
+    return get_cached_count(
+        (TN.LABELS, ifk, manual_checks.model_dump_json() if has_checks else None),
+        [TN.LABELS],
+        lambda: db.scalar(stmt),
+    )
+
+
+def get_filtered_select(
+    ifk: "IsForKiller",
+    manual_checks: ManualChecksIn | None,
+    default_cols: list,
+    force_prepend_default_cols: bool,
+):
+    """`get_filtered_query` equivalent, for use with an async session."""
+    cols = get_filtered_cols(ifk, manual_checks, default_cols, force_prepend_default_cols)
+    stmt = select(*cols)
+    stmt = additional_filters(stmt, ifk, manual_checks)
+
+    return stmt
+
+
+# * Stats
+
+
+def class_counts_select(
+    fmts: list["FullModelType"],
+    manual_checks: ManualChecksIn | None,
+) -> "Select":
+    """Count the labeled rows of each class of every fmt in a single query.
+    Columns of multiple-per-player models (perks, addons) are unpivoted with UNION ALL,
+    and killer and survivor fmts are split by 'player_id'.
+    Null and negative (sentinel) values aren't class ids, so they aren't counted.
+    """
+    parts = []
+    for fmt in fmts:
+        mt, _, ifk = from_fmt(fmt)
+        for key in MT_TO_COLS[mt]:
+            col = getattr(Labels, key)
+            part = select(literal(fmt).label("fmt"), col.label("value"))
+            part = part.where(col >= 0)
+            parts.append(additional_filters(part, ifk, manual_checks))
+
+    sub = union_all(*parts).subquery()
+    return select(sub.c.fmt, sub.c.value, func.count()).group_by(sub.c.fmt, sub.c.value)
+
+
+def get_labels_stats(
+    db: "Session",
+    fmts: list["FullModelType"],
+    manual_checks: ManualChecksIn | None,
+) -> dict["FullModelType", list[int]]:
+    """Class histogram of each fmt, as a list of counts indexed by the class id,
+    cached until the next labels write.
+    """
+    fmts = list(dict.fromkeys(fmts))
+    has_checks = manual_checks is not None and manual_checks.is_init
+
+    def compute() -> dict["FullModelType", list[int]]:
+        stats = {fmt: [] for fmt in fmts}
+        for fmt, value, n in db.execute(class_counts_select(fmts, manual_checks)):
+            counts = stats[fmt]
+            if value >= len(counts):
+                counts.extend([0] * (value + 1 - len(counts)))
+            counts[value] = n
+        return stats
+
+    return get_cached_count(
+        (
+            TN.LABELS,
+            "stats",
+            tuple(fmts),
+            manual_checks.model_dump_json() if has_checks else None,
+        ),
+        [TN.LABELS],
+        compute,
+    )
+
+
 # * Batch create labels
 
 
@@ -196,17 +329,32 @@ def join_dfs(dfs: dict["FullModelType", pd.DataFrame]) -> pd.DataFrame:
     return joined_df
 
 
-def process_joined_df(joined_df: pd.DataFrame) -> pd.DataFrame:
+def process_joined_df(db: "Session", joined_df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the filenames of the joined DataFrame with their match ids."""
     joined_df = joined_df.reset_index(drop=False)
 
-    joined_df["match_id"] = joined_df["name"].map(
-        lambda f: getr(f"{EP.MATCHES}/id", params={"filename": f})
-    )
+    ids = get_ids(db, Match, joined_df["name"].unique().tolist(), name_col="filename")
+    ids_df = pd.DataFrame({"name": list(ids.keys()), "match_id": list(ids.values())})
+
+    joined_df = joined_df.merge(ids_df, how="left", on="name", validate="many_to_one")
+    missing = joined_df.loc[joined_df["match_id"].isna(), "name"].unique()
+    if missing.size > 0:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            f"{missing.size} matches were not found, e.g. '{missing[0]}'",
+        )
+
     joined_df = joined_df.drop("name", axis=1)
     return joined_df
 
 
-def post_labels(joined_df: pd.DataFrame) -> None:
+LABELS_STAGING = "labels_staging"
+
+
+def post_labels(db: "Session", joined_df: pd.DataFrame) -> int:
+    """Bulk load the labels with COPY into a staging table, and then merge them
+    into 'labels' with an upsert. Returns the amount of rows upserted.
+    """
     joined_df = joined_df.astype(
         {
             "match_id": int,
@@ -218,26 +366,151 @@ def post_labels(joined_df: pd.DataFrame) -> None:
             "perks_3": int,
         }
     )
-    for _, row in joined_df.iterrows():
-        postr(
-            EP.LABELS,
-            json={
-                "match_id": int(row["match_id"]),
-                "player": {
-                    "id": int(row["player_id"]),
-                    "character_id": int(row["character"]),
-                    "perk_ids": [int(row[f"perks_{i}"]) for i in range(4)],
-                    "item_id": None,  # TODO: What?
-                    "addon_ids": None,
-                    "offering_id": None,
-                    "status_id": None,
-                    "points": None,
-                },
-            },
+    pk_cols = ["match_id", "player_id"]
+    cols = pk_cols + [c for c in joined_df.columns if c not in pk_cols]
+
+    copy_to_staging(db, joined_df[cols], TN.LABELS, LABELS_STAGING)
+
+    cols_str = ", ".join(cols)
+    set_str = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in pk_cols)
+    result = db.execute(
+        text(
+            f"INSERT INTO {TN.LABELS} ({cols_str}) "
+            + f"SELECT {cols_str} FROM {LABELS_STAGING} "
+            + f"ON CONFLICT ({', '.join(pk_cols)}) "
+            + f"DO UPDATE SET {set_str}, date_modified = now()"
         )
+    )
+    db.commit()
+    bump_version(TN.LABELS)
+
+    return result.rowcount
 
 
 def process_fmt_strict(fmt: "FullModelType") -> tuple["ModelType", list["SQLColumn"]]:
     """Process full model type for the strict update endpoint."""
     mt, _, _ = from_fmt(fmt)
     return mt, MT_TO_COLS[mt]
+
+
+# * Bulk create labels
+
+
+def insert_empty_labels(db: "Session", match_ids: list[int]) -> int:
+    """Insert the empty labels rows of the 5 players of each match,
+    skipping the ones that already exist. Returns the amount of rows inserted.
+    """
+    if not match_ids:
+        return 0
+
+    result = db.execute(
+        text(
+            f"INSERT INTO {TN.LABELS} (match_id, player_id) "
+            + "SELECT m.id, p.player_id "
+            + f"FROM {TN.MATCHES} m CROSS JOIN generate_series(0, 4) AS p(player_id) "
+            + "WHERE m.id = ANY(:match_ids) "
+            + "AND NOT EXISTS ("
+            + f"SELECT 1 FROM {TN.LABELS} l "
+            + "WHERE l.match_id = m.id AND l.player_id = p.player_id"
+            + ")"
+        ),
+        {"match_ids": match_ids},
+    )
+    db.commit()
+    bump_version(TN.LABELS)
+
+    return result.rowcount
+
+
+# * Bulk update labels
+
+
+def group_preds_by_col(
+    fmt: "FullModelType",
+    zipped: Iterable[tuple[int, int, int | None, int]],
+) -> tuple["ModelType", dict["SQLColumn", list[tuple[int, int, int]]]]:
+    """Group (match_id, player_id, item_id, pred) predictions by their labels column."""
+    mt, keys = process_fmt_strict(fmt)
+    is_mpp = mt in MULTIPLE_PER_PLAYER
+
+    rows_by_col = {}
+    for mid, pid, iid, pred in zipped:
+        assert (iid is not None) == is_mpp
+        key = keys[iid if is_mpp else 0]
+        rows_by_col.setdefault(key, []).append((mid, pid, pred))
+
+    return mt, rows_by_col
+
+
+def update_labels_col_from_values(
+    db: "Session",
+    mt: "ModelType",
+    key: "SQLColumn",
+    rows: list[tuple[int, int, int]],
+    user_id: int,
+    extr_id: int,
+) -> int:
+    """Set-based UPDATE ... FROM (VALUES ...) of a single labels column.
+    Returns the number of rows touched.
+    """
+    preds = values(
+        column("match_id", Labels.match_id.type),
+        column("player_id", Labels.player_id.type),
+        column("value", getattr(Labels, key).type),
+        name="preds",
+    ).data(rows)
+
+    stmt = (
+        update(Labels)
+        .where(Labels.match_id == preds.c.match_id)
+        .where(Labels.player_id == preds.c.player_id)
+        .values(
+            {
+                key: preds.c.value,
+                "date_modified": func.now(),
+                "user_id": user_id,
+                "extr_id": extr_id,
+                f"{mt}_mckd": False,
+            }
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount
+
+
+def bulk_update_labels_strict(
+    db: "Session",
+    fmt: "FullModelType",
+    zipped: Iterable[tuple[int, int, int | None, int]],
+    user_id: int,
+    extr_id: int,
+    batch_size: int | None = None,
+) -> LabelsBulkReport:
+    """Bulk equivalent of the strict labels update for a whole fmt.
+
+    If `batch_size` is None all predictions are applied in a single transaction,
+    else every batch of at most `batch_size` rows is committed on its own.
+    """
+    assert batch_size is None or batch_size > 0
+
+    mt, rows_by_col = group_preds_by_col(fmt, zipped)
+
+    total_rows, updated, batches = 0, 0, 0
+    for key, rows in rows_by_col.items():
+        it = iter(rows)
+        while batch := list(islice(it, batch_size)):
+            updated += update_labels_col_from_values(db, mt, key, batch, user_id, extr_id)
+            total_rows += len(batch)
+            batches += 1
+            if batch_size is not None:
+                db.commit()
+                bump_version(TN.LABELS)
+    db.commit()
+    bump_version(TN.LABELS)
+
+    return LabelsBulkReport(
+        fmt=fmt,
+        rows=total_rows,
+        updated=updated,
+        batches=batches,
+    )
@@ -1,69 +1,287 @@
 """Extra code for the '/matches' endpoint."""
 
+import datetime as dt
+import json
 import os
 import re
 import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
-from dbdie_classes.paths import absp, IMG_MAIN_FD_RP
+from dbdie_classes.paths import absp, CROPPED_IMG_FD_RP, IMG_MAIN_FD_RP
+from dbdie_classes.schemas.groupings import MatchOut
+import numpy as np
+from PIL import Image
+from sqlalchemy import insert
 
-from backbone.endpoints import getr, postr
-from backbone.options import ENDPOINTS as EP
+from backbone.cache import bump_version
+from backbone.endpoints import get_image
+from backbone.exceptions import ItemNotFoundException, ValidationException
+from backbone.models.groupings import Match
+from backbone.options import TABLE_NAMES as TN
+from backbone.sequences import allocate_ids
+from backbone.sqla import object_as_dict
+from constants import BASE_XY
 
 if TYPE_CHECKING:
     from dbdie_classes.base import Filename, PathToFolder
-    from dbdie_classes.schemas.groupings import MatchCreate, MatchOut
+    from fastapi import Request, Response
+    from sqlalchemy.orm import Session
 
 DATE_PATT = re.compile(r"20\d\d-[0-1]\d-[0-3]\d")
 
+JOURNAL_FILENAME = ".vfd_journal.json"
+MOVE_WORKERS = 8
 
-def form_match(match: "MatchCreate") -> dict:
-    new_match = {"id": getr(f"{EP.MATCHES}/count")} | match.model_dump()
-    return new_match
+RENDITION_WIDTHS = [240, 480, 960, BASE_XY[0]]
+RENDITIONS_FD = ".renditions"
+RENDITION_QUALITY = 85
 
 
-def get_versioned_fd_data(
-    dbdv_name: str,
-) -> tuple[list["Filename"], "PathToFolder", "PathToFolder"]:
-    """Get necessary objects for a certain DBDVersionOut."""
+def get_versioned_fds(dbdv_name: str) -> tuple["PathToFolder", "PathToFolder"]:
+    """Get the source and destination folders for a certain DBDVersionOut."""
     src_main_fd = absp(IMG_MAIN_FD_RP)
 
     src_fd = os.path.join(src_main_fd, f"versioned/{dbdv_name}")
     assert os.path.isdir(src_fd)
-    fs = os.listdir(src_fd)
-    assert fs, "Versioned folder cannot be empty."
 
     dst_fd = os.path.join(src_main_fd, "pending")
 
+    return src_fd, dst_fd
+
+
+def get_versioned_fd_data(
+    dbdv_name: str,
+) -> tuple[list["Filename"], "PathToFolder", "PathToFolder"]:
+    """Get necessary objects for a certain DBDVersionOut."""
+    src_fd, dst_fd = get_versioned_fds(dbdv_name)
+
+    fs = [f for f in os.listdir(src_fd) if f != JOURNAL_FILENAME]
+    assert fs, "Versioned folder cannot be empty."
+
     return fs, src_fd, dst_fd
 
 
+# * Upload journal
+
+
+def journal_path(src_fd: "PathToFolder") -> str:
+    return os.path.join(src_fd, JOURNAL_FILENAME)
+
+
+def read_journal(src_fd: "PathToFolder") -> dict | None:
+    """Read the journal of an interrupted upload of the folder, if there is one."""
+    path = journal_path(src_fd)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_journal(src_fd: "PathToFolder", journal: dict) -> None:
+    """Atomically write the upload journal of the folder."""
+    path = journal_path(src_fd)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(journal, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def remove_journal(src_fd: "PathToFolder") -> None:
+    os.remove(journal_path(src_fd))
+
+
+# * Upload
+
+
+def move_file(f: "Filename", src_fd: "PathToFolder", dst_fd: "PathToFolder") -> None:
+    """Idempotent file move, so that an interrupted batch of moves can be resumed."""
+    src, dst = os.path.join(src_fd, f), os.path.join(dst_fd, f)
+    if os.path.exists(src):
+        shutil.move(src, dst)
+    elif not os.path.exists(dst):
+        raise FileNotFoundError(f"'{f}' was found neither in '{src_fd}' nor in '{dst_fd}'")
+
+
+def move_files(
+    filenames: list["Filename"],
+    src_fd: "PathToFolder",
+    dst_fd: "PathToFolder",
+) -> None:
+    """Move files in parallel with a thread pool."""
+    with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+        list(executor.map(lambda f: move_file(f, src_fd, dst_fd), filenames))
+
+
+def get_matches_out(db: "Session", match_ids: list[int]) -> list[MatchOut]:
+    matches = db.query(Match).filter(Match.id.in_(match_ids)).order_by(Match.id).all()
+    return [MatchOut(**object_as_dict(m)) for m in matches]
+
+
 def upload_dbdv_matches(
+    db: "Session",
     filenames: list["Filename"],
     src_fd: "PathToFolder",
     dst_fd: "PathToFolder",
     dbdv_id: int,
     special_mode: bool | None,
-) -> list["MatchOut"]:
-    """Upload loop for matches of a certain DBDVersionOut."""
-    matches = []
-    dates = [DATE_PATT.search(f).group() for f in filenames]
-
-    for f, d in zip(filenames, dates):
-        matches.append(
-            postr(
-                EP.MATCHES,
-                json={
-                    "filename": f,
-                    "match_date": d,
-                    "dbdv_id": dbdv_id,
-                    "special_mode": special_mode,
-                    "user_id": 1,  # TODO
-                    "extr_id": None,  # TODO
-                    "kills": None,  # TODO
-                },
+) -> list[MatchOut]:
+    """Upload matches of a certain DBDVersionOut with a single multi-row insert,
+    and then move them in parallel.
+
+    The steps are journaled in the source folder so that an interrupted upload
+    can be resumed or rolled back (see `recover_dbdv_matches`).
+    """
+    match_ids = allocate_ids(db, Match, len(filenames))
+    journal = {
+        "state": "inserting",
+        "match_ids": match_ids,
+        "filenames": filenames,
+        "dst_fd": dst_fd,
+    }
+    write_journal(src_fd, journal)
+
+    db.execute(
+        insert(Match),
+        [
+            {
+                "id": mid,
+                "filename": f,
+                "match_date": dt.date.fromisoformat(DATE_PATT.search(f).group()),
+                "dbdv_id": dbdv_id,
+                "special_mode": special_mode,
+                "user_id": 1,  # TODO
+                "extr_id": None,  # TODO
+                "kills": None,  # TODO
+            }
+            for mid, f in zip(match_ids, filenames)
+        ],
+    )
+    db.commit()
+    bump_version(TN.MATCHES)
+
+    write_journal(src_fd, journal | {"state": "moving"})
+    move_files(filenames, src_fd, dst_fd)
+    remove_journal(src_fd)
+
+    return get_matches_out(db, match_ids)
+
+
+def recover_dbdv_matches(
+    db: "Session",
+    journal: dict,
+    src_fd: "PathToFolder",
+    rollback: bool,
+) -> list[MatchOut] | None:
+    """Recover an interrupted upload from its journal.
+
+    rollback: If True, delete the inserted matches and move back their files.
+        Else, finish moving the files of the inserted matches.
+
+    Returns the matches of the resumed upload, or None if there is nothing
+    left to recover (the insert was never committed or it was rolled back).
+    """
+    match_ids = journal["match_ids"]
+    filenames = journal["filenames"]
+    dst_fd = journal["dst_fd"]
+
+    inserted = db.query(Match.id).filter(Match.id.in_(match_ids)).count()
+    assert inserted in {0, len(match_ids)}, "Journaled matches were partially inserted."
+
+    if rollback:
+        move_files(filenames, dst_fd, src_fd)
+        if inserted:
+            db.query(Match).filter(Match.id.in_(match_ids)).delete(synchronize_session=False)
+            db.commit()
+            bump_version(TN.MATCHES)
+        remove_journal(src_fd)
+        return None
+
+    if not inserted:
+        remove_journal(src_fd)
+        return None
+
+    move_files(filenames, src_fd, dst_fd)
+    remove_journal(src_fd)
+
+    return get_matches_out(db, match_ids)
+
+
+# * Image renditions
+
+
+def rendition_width(w: int, src_width: int) -> int:
+    """Smallest rendition width that is at least 'w', capped at the source width."""
+    assert w > 0, "The width must be positive"
+    return min(
+        next((rw for rw in RENDITION_WIDTHS if rw >= w), src_width),
+        src_width,
+    )
+
+
+def downscale(arr: np.ndarray, factor: int) -> np.ndarray:
+    """Downscale an (H, W, C) image by an integer factor, averaging each block of pixels.
+    Trailing rows and columns that don't fill a whole block are dropped.
+    """
+    h, w = arr.shape[0] // factor, arr.shape[1] // factor
+    blocks = arr[: h * factor, : w * factor].reshape(h, factor, w, factor, -1)
+    return blocks.mean(axis=(1, 3), dtype=np.float32).round().astype(np.uint8)
+
+
+def make_rendition(src: str, dst: str, width: int, src_mtime_ns: int) -> None:
+    """Save a downscaled rendition of the source image, with the source's mtime.
+    The rendition is written to a temporary file first so that it's never read half-written.
+    """
+    with Image.open(src) as img:
+        arr = np.asarray(img.convert("RGB"))
+    factor = max(round(arr.shape[1] / width), 1)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            Image.fromarray(downscale(arr, factor)).save(
+                f,
+                format="JPEG",
+                quality=RENDITION_QUALITY,
             )
-        )
-        shutil.move(os.path.join(src_fd, f), os.path.join(dst_fd, f))
+        os.utime(tmp, ns=(src_mtime_ns, src_mtime_ns))
+        os.replace(tmp, dst)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def get_match_rendition(filename: "Filename", w: int, request: "Request") -> "Response":
+    """Get a downscaled rendition of a match image that is at least 'w' pixels wide.
+
+    Renditions are generated on the first request and cached on disk next to the
+    source image, and they are regenerated whenever the source's mtime changes.
+    """
+    assert "." not in filename[:-4]
+    if w <= 0:
+        raise ValidationException("The width must be positive.")
+
+    src_fd = absp(CROPPED_IMG_FD_RP)
+    src = os.path.join(src_fd, filename)
+    try:
+        with Image.open(src) as img:
+            src_width = img.width
+        src_mtime_ns = os.stat(src).st_mtime_ns
+    except FileNotFoundError as e:
+        raise ItemNotFoundException("Match image", filename) from e
+
+    width = rendition_width(w, src_width)
+    if width == src_width:
+        return get_image(filename, filename, "Match", src_fd, request=request)
+
+    rend_rp = os.path.join(RENDITIONS_FD, f"{filename[:-4]}_w{width}.jpg")
+    dst = os.path.join(src_fd, rend_rp)
+    try:
+        is_fresh = os.stat(dst).st_mtime_ns == src_mtime_ns
+    except FileNotFoundError:
+        is_fresh = False
+    if not is_fresh:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        make_rendition(src, dst, width, src_mtime_ns)
 
-    return matches
+    return get_image(filename, rend_rp, "Match", src_fd, request=request)
@@ -8,12 +8,16 @@ from dbdie_classes.groupings import PredictableTuples
 from dbdie_classes.options.FMT import ALL as ALL_FMTS_ORDERED
 from dbdie_classes.options.IMPLEMENTED import FMTS as IMPLEMENTED_FMTS
 
-from backbone.endpoints import getr, postr, putr
+from backbone.code.fmts import count_fmts_classes
+from backbone.endpoints import do_count, postr, putr
+from backbone.models.objects import Extractor, Model
 from backbone.options import ENDPOINTS as EP
 from backbone.options import ML_ENDPOINTS as MLEP
+from backbone.services import fetch_one
 
 if TYPE_CHECKING:
     from dbdie_classes.base import FullModelType
+    from sqlalchemy.orm import Session
 
 
 def extr_existance(
@@ -29,25 +33,26 @@ def extr_existance(
 
 
 def get_extr_id(
+    db: "Session",
     extr_id: int | None,
     extr_exists: bool,
 ) -> tuple[int]:
-    return extr_id if extr_exists else getr(f"{EP.EXTRACTOR}/count")
+    return extr_id if extr_exists else do_count(db, Extractor)
 
 
-def goi_existing(extr_id: str) -> tuple[
+def goi_existing(db: "Session", extr_id: str) -> tuple[
     dict[str, int | str],
     dict["FullModelType", dict[str, int]],
     PredictableTuples,
 ]:
     """Get objects info when Extractor already exist."""
-    extr_info = getr(f"{EP.EXTRACTOR}/{extr_id}")
+    extr_info = fetch_one(db, Extractor, extr_id)
 
     raise NotImplementedError
     fmts_ = ...  # TODO
     extr = ...
     models = {
-        fmt: getr(f"{EP.MODELS}/{mid}")
+        fmt: fetch_one(db, Model, mid)
         for fmt, mid in extr_info["models_ids"].items()
     }
 
@@ -55,6 +60,7 @@ def goi_existing(extr_id: str) -> tuple[
 
 
 def goi_not_existing(
+    db: "Session",
     extr_id: int,
     extr_name: str,
     fmts: list["FullModelType"] | None,
@@ -67,7 +73,7 @@ def goi_not_existing(
     """Get objects info when Extractor doesn't exist yet."""
     fmts_ = deepcopy(fmts) if fmts is not None else IMPLEMENTED_FMTS
 
-    model_count = getr(f"{EP.MODELS}/count")
+    model_count = do_count(db, Model)
 
     extr_info = {
         "id": extr_id,
@@ -82,14 +88,11 @@ def goi_not_existing(
     return extr_info, models_info, PredictableTuples.from_fmts(fmts_)
 
 
-def get_fmts_with_counts(ptups: PredictableTuples) -> dict["FullModelType", int]:
-    return {
-        ptup.fmt: getr(
-            f"{EP.MT_TO_ENDPOINT[ptup.mt]}/count",
-            params={"ifk": ptup.ifk},
-        )
-        for ptup in ptups
-    }
+def get_fmts_with_counts(
+    db: "Session",
+    ptups: PredictableTuples,
+) -> dict["FullModelType", int]:
+    return count_fmts_classes(db, [ptup.fmt for ptup in ptups])
 
 
 def train_extractor(
@@ -14,6 +14,20 @@ class Settings(BaseSettings):
     ml_host: str
     check_rps: str
 
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+
+    catalog_ttl: float = 300.0
+    icons_max_age: int = 7 * 24 * 60 * 60
+    icons_cache_bytes: int = 64 * 1024 * 1024
+
+    jobs_max_workers: int = 2
+    jobs_heartbeat: float = 30.0
+    jobs_stale_after: float = 120.0
+
     class Config:
         env_file = ".env"
 
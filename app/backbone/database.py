@@ -1,7 +1,9 @@
 """Database connection code"""
 
 from backbone.config import ST
+from backbone.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -11,15 +13,42 @@ SQLALCHEMY_DATABASE_URL = (
     + f":{ST.db_password}@{ST.db_hostname}"
     + f":{ST.db_port}/{ST.db_name}"
 )
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace(
+    "postgresql://",
+    "postgresql+asyncpg://",
+    1,
+)
 # print(SQLALCHEMY_DATABASE_URL)
 
+POOL_KWARGS = {
+    "pool_size": ST.db_pool_size,
+    "max_overflow": ST.db_max_overflow,
+    "pool_timeout": ST.db_pool_timeout,
+    "pool_recycle": ST.db_pool_recycle,
+    "pool_pre_ping": ST.db_pool_pre_ping,
+}
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    **POOL_KWARGS,
     # connect_args={"check_same_thread": False}  # for SQLite
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async stack for read-heavy endpoints, so that they don't hold a threadpool slot
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    **POOL_KWARGS,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -27,3 +56,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,28 +2,45 @@
 
 import os
 import re
+from email.utils import formatdate, parsedate_to_datetime
 from typing import TYPE_CHECKING
 
 from dbdie_classes.paths import CROPPED_IMG_FD_RP, absp
-from fastapi import Response, status
+from fastapi import Request, Response, status
 from fastapi.exceptions import HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import requests
+from sqlalchemy import String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 
+from backbone.cache import bump_version, get_cached_count, icons_lru
 from backbone.config import ST
-from backbone.exceptions import ItemNotFoundException, NameNotFoundException
-from backbone.options import ENDPOINTS as EP
+from backbone.exceptions import (
+    ItemNotFoundException,
+    NameNotFoundException,
+    ValidationException,
+)
+from backbone.models.helpers import DBDVersion
 from backbone.options import TABLE_NAMES as TN
-from backbone.sqla import get_items_query
+from backbone.sqla import (
+    count_select,
+    encode_cursor,
+    estimate_count,
+    get_items_query,
+    get_items_select,
+    search_select,
+)
 from constants import ICONS_FOLDER
 
 if TYPE_CHECKING:
     from dbdie_classes.base import Endpoint, FullEndpoint, PathToFolder
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 
 ENDPOINT_PATT = re.compile(r"\/[a-z\-]+$")
 NOT_WS_PATT = re.compile(r"\S")
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 def endp(endpoint: "Endpoint") -> "FullEndpoint":
@@ -45,14 +62,19 @@ def get_req(endpoint: "Endpoint", id: int) -> dict:
     return resp.json()
 
 
-def parse_or_raise(resp, exp_status_code: int = status.HTTP_200_OK):
-    """Parse Response as JSON or raise error as exception, depending on status code."""
+def check_status_code(resp, exp_status_code: int = status.HTTP_200_OK) -> None:
+    """Raise error as exception if the Response doesn't have the expected status code."""
     if resp.status_code != exp_status_code:
         print(f"WRONG STATUS CODE: {resp.status_code} (expected: {exp_status_code})")
         raise HTTPException(
             status_code=resp.status_code,
             detail=resp.reason,
         )
+
+
+def parse_or_raise(resp, exp_status_code: int = status.HTTP_200_OK):
+    """Parse Response as JSON or raise error as exception, depending on status code."""
+    check_status_code(resp, exp_status_code)
     return resp.json()
 
 
@@ -76,6 +98,20 @@ def postr(endpoint: "Endpoint", ml: bool = False, **kwargs):
     )
 
 
+def postr_stream(endpoint: "Endpoint", ml: bool = False, **kwargs) -> requests.Response:
+    """Include the boilerplate for a POST request whose response body is streamed.
+    The Response must be closed by the caller.
+    """
+    f = mlendp if ml else endp
+    resp = requests.post(f(endpoint), stream=True, **kwargs)
+    try:
+        check_status_code(resp, exp_status_code=status.HTTP_201_CREATED)
+    except HTTPException:
+        resp.close()
+        raise
+    return resp
+
+
 def putr(endpoint: "Endpoint", ml: bool = False, **kwargs):
     """Include the boilerplate for a PUT request."""
     f = mlendp if ml else endp
@@ -110,6 +146,24 @@ def filter_one(
     return item, filter_query
 
 
+async def filter_one_async(
+    adb: "AsyncSession",
+    model,
+    id: int,
+    model_str: str | None = None,
+):
+    """Async version of `filter_one`, that only returns the item."""
+    assert id >= 0, "ID can't be negative"
+    item = await adb.get(model, id)
+    if item is None:
+        item_type = (
+            model_str if model_str is not None
+            else model.__tablename__.capitalize()
+        )
+        raise ItemNotFoundException(item_type, id)
+    return item
+
+
 def get_first(
     db: "Session",
     limit: int,
@@ -132,24 +186,121 @@ def get_many(
     ifk: bool | None = None,
     mt = None,
     text: str = "",
+    after: str | None = None,
 ):
-    """Base get many function. 'model' is the sqlalchemy model."""
-    query = get_items_query(db, limit, model, skip, ifk, mt, text)
+    """Base get many function. 'model' is the sqlalchemy model.
+    If the cursor 'after' is provided, keyset pagination is used instead of 'skip'.
+    """
+    query = get_items_query(db, limit, model, skip, ifk, mt, text, after)
     return query.all()
 
 
+async def get_many_async(
+    adb: "AsyncSession",
+    limit: int,
+    model,
+    skip: int = 0,
+    ifk: bool | None = None,
+    mt = None,
+    text: str = "",
+    after: str | None = None,
+):
+    """Async version of `get_many`."""
+    stmt = get_items_select(limit, model, skip, ifk, mt, text, after)
+    return (await adb.scalars(stmt)).all()
+
+
+async def search_async(
+    adb: "AsyncSession",
+    model,
+    search_text: str,
+    limit: int = 10,
+    mt_type=None,
+) -> list[dict]:
+    """Base fuzzy search function. 'model' is the sqlalchemy model,
+    and 'mt_type' the model whose ifk is served along with the items, if any.
+    """
+    if NOT_WS_PATT.search(search_text) is None:
+        raise ValidationException("The search text can't be empty")
+    stmt = search_select(model, search_text.strip(), limit, mt_type)
+    return [dict(row) for row in (await adb.execute(stmt)).mappings()]
+
+
+def fast_response(
+    schema,
+    content: dict | list[dict],
+    headers: dict[str, str] | None = None,
+) -> ORJSONResponse:
+    """Response for trusted rows (i.e. straight from the DB), that skips validation:
+    the output 'schema' is constructed as is and serialized with orjson.
+    FastAPI doesn't validate a returned Response against the response_model either.
+    """
+    if isinstance(content, list):
+        content = [schema.model_construct(**row).model_dump() for row in content]
+    else:
+        content = schema.model_construct(**content).model_dump()
+    return ORJSONResponse(content, headers=headers)
+
+
+def set_next_cursor(
+    response: Response,
+    rows: list,
+    limit: int,
+    key_names: tuple[str, ...] = ("id",),
+) -> None:
+    """Set the cursor of the next page in the response headers,
+    unless 'rows' was the last page.
+    """
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            *(getattr(last, k) for k in key_names)
+        )
+
+
 def do_count(
     db: "Session",
     model,
     ifk: bool | None = None,
     mt_type = None,
     text: str = "",
+    estimate: bool = False,
 ) -> int:
-    """Base count function.
-    'model' is the sqlalchemy model.
+    """Base count function, with a direct `SELECT count(*)` that is cached until
+    the next write. 'model' is the sqlalchemy model.
+
+    If 'estimate' and there are no filters, the planner's estimate is returned
+    instead, which is instantaneous even for huge tables.
     """
-    query = get_items_query(db, 100_000, model, 0, ifk, mt_type, text)
-    return query.count()
+    tname = model.__tablename__
+    if estimate and text == "" and ifk is None and tname != TN.CHARACTER:
+        n = estimate_count(db, tname)
+        if n is not None:
+            return n
+
+    mt_tname = mt_type.__tablename__ if mt_type is not None else None
+    return get_cached_count(
+        (tname, mt_tname, ifk, text),
+        [tname] if mt_tname is None else [tname, mt_tname],
+        lambda: db.scalar(count_select(model, ifk, mt_type, text)),
+    )
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Whether the conditional headers of the request match the current file version."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
 
 
 def get_image(
@@ -157,23 +308,52 @@ def get_image(
     img_add_path: str,
     model_str: str,
     folder_path: "PathToFolder",
-) -> FileResponse:
+    request: Request | None = None,
+    cache_control: str = "no-cache",
+    in_memory: bool = False,
+) -> Response:
     """Base get image function.
     Get the image of the 'endpoint' item with id 'id'.
+
+    Responses carry an ETag and Last-Modified header, and a 304 is returned
+    if the request's conditional headers match them. If 'in_memory',
+    the image bytes are served from an LRU cache instead of from disk.
     """
     path = os.path.join(folder_path, img_add_path)
-    if not os.path.exists(path):
-        raise ItemNotFoundException(f"{model_str} image", id)
-    return FileResponse(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError as e:
+        raise ItemNotFoundException(f"{model_str} image", id) from e
+
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if request is not None and is_not_modified(request, headers["ETag"], stat.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if not in_memory:
+        return FileResponse(path, headers=headers, stat_result=stat)
+
+    key = (path, stat.st_mtime_ns)
+    content = icons_lru.get(key)
+    if content is None:
+        with open(path, "rb") as f:
+            content = f.read()
+        icons_lru.put(key, content)
+    return Response(content, media_type="image/png", headers=headers)
 
 
 def get_icon(
     endpoint: "Endpoint",
     id: int,
     plural_len: int = 1,
-) -> FileResponse:
+    request: Request | None = None,
+) -> Response:
     """Base get icon function.
     Get the icon of the 'endpoint' item with id 'id'.
+    Icons are cached in memory and are cacheable by the client.
     """
     assert isinstance(id, int), "ID must be an integer"
     assert id >= 0, "ID can't be negative"
@@ -183,13 +363,27 @@ def get_icon(
     model_str = endpoint[:-plural_len] if plural_len > 0 else endpoint
     model_str = model_str.capitalize()
 
-    return get_image(id, img_add_path, model_str, ICONS_FOLDER)
+    return get_image(
+        id,
+        img_add_path,
+        model_str,
+        ICONS_FOLDER,
+        request=request,
+        cache_control=f"public, max-age={ST.icons_max_age}",
+        in_memory=True,
+    )
 
 
-def get_match_img(filename: str) -> FileResponse:
+def get_match_img(filename: str, request: Request | None = None) -> Response:
     """Base get match image function."""
     assert "." not in filename[:-4]
-    return get_image(filename, filename, "Match", absp(CROPPED_IMG_FD_RP))
+    return get_image(
+        filename,
+        filename,
+        "Match",
+        absp(CROPPED_IMG_FD_RP),
+        request=request,
+    )
 
 
 def get_id(
@@ -209,6 +403,27 @@ def get_id(
     return item.id
 
 
+def get_ids(
+    db: "Session",
+    model,
+    names: list[str],
+    name_col: str = "name",
+) -> dict[str, int]:
+    """Bulk version of `get_id`, using a single `WHERE <name_col> = ANY(...)` query.
+    Names that weren't found are left out of the returned name-to-id mapping.
+    """
+    assert name_col in {"name", "filename"}
+    if not names:
+        return {}
+    col = getattr(model, name_col)
+    rows = (
+        db.query(col, model.id)
+        .filter(col == any_(bindparam("names", list(names), type_=ARRAY(String))))
+        .all()
+    )
+    return {name: id for name, id in rows}
+
+
 def update_one(
     db: "Session",
     schema_create,
@@ -224,6 +439,7 @@ def update_one(
 
     select_query.update(new_info, synchronize_session=False)
     db.commit()
+    bump_version(model.__tablename__)
 
     return Response(status_code=status.HTTP_200_OK)
 
@@ -239,6 +455,7 @@ def update_many(
     for record in records:
         update_f(record)
     db.commit()
+    bump_version(model.__tablename__)
 
 
 def update_one_strict(
@@ -259,6 +476,7 @@ def update_one_strict(
     new_info = {user_key: user_value}
     select_query.update(new_info, synchronize_session=False)
     db.commit()
+    bump_version(model.__tablename__)
 
     return Response(status_code=status.HTTP_200_OK)
 
@@ -267,6 +485,7 @@ def add_commit_refresh(db: "Session", model) -> None:
     """Add and commit a sqlalchemy change, and then refresh."""
     db.add(model)
     db.commit()
+    bump_version(model.__tablename__)
     db.refresh(model)
 
 
@@ -280,15 +499,16 @@ def delete_one(
     item, _ = filter_one(db, model, id, model_str)
     db.delete(item)
     db.commit()
+    bump_version(model.__tablename__)
     return Response(status_code=status.HTTP_200_OK)
 
 
 # * Specific endpoint functions
 
 
-def dbdv_str_to_id(s: str) -> int:
+def dbdv_str_to_id(db: "Session", s: str) -> int:
     """Converts a DBDVersion string to a DBDVersion id."""
-    return getr(f"{EP.DBD_VERSION}/id", params={"dbdv_str": s})
+    return get_id(db, DBDVersion, "DBD version", s)
 
 
 def get_types(db: "Session", type_sqla_model):
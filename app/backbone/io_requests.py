@@ -1,46 +1,76 @@
 import asyncio
+from itertools import chain
 
 import aiohttp
 from backbone.endpoints import endp
+from backbone.options import ENDPOINTS as EP
 from dbdie_classes.base import EncodedInfo
 from dbdie_classes.schemas.predictables import StatusOut
 
+MAX_CONCURRENT_REQUESTS = 8
 
-async def fetch(session, url):
-    async with session.get(url) as response:
-        return await response.json()
 
+async def fetch_bulk(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    endpoint: str,
+    ids: list[int],
+) -> list[dict]:
+    async with semaphore, session.post(endp(f"{endpoint}/bulk"), json=ids) as response:
+        response.raise_for_status()
+        return (await response.json())["items"]
 
-async def fetch_list(item_type: str, ids: list[int]):
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch(session, endp(f"/{item_type}/{id}")) for id in ids]
-        items = await asyncio.gather(*tasks)
-    return items
+
+async def fetch_by_ids(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    endpoint: str,
+    ids: list[int],
+) -> dict[int, dict]:
+    """Fetch the items of a type with as few bulk requests as possible,
+    as an id-to-item mapping. Ids that weren't found are left out.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    chunks = await asyncio.gather(
+        *[
+            fetch_bulk(session, semaphore, endpoint, unique_ids[i : i + EP.MAX_BULK_IDS])
+            for i in range(0, len(unique_ids), EP.MAX_BULK_IDS)
+        ]
+    )
+    return {item["id"]: item for item in chain.from_iterable(chunks)}
 
 
 async def get_all_info(ei_list: list[EncodedInfo]) -> dict:
-    characters = await fetch_list("characters", [ei[0] for ei in ei_list])
-    item = await fetch_list("items", [ei[2] for ei in ei_list])
-    offering = await fetch_list("offerings", [ei[4] for ei in ei_list])
+    """Get the full information of each player from their encoded info,
+    with one deduplicated request per type, all of them concurrent.
+    """
+    ids = {
+        EP.CHARACTER: [ei[0] for ei in ei_list],
+        EP.PERKS: [id for ei in ei_list for id in ei[1]],
+        EP.ITEM: [ei[2] for ei in ei_list],
+        EP.ADDONS: [id for ei in ei_list for id in ei[3]],
+        EP.OFFERING: [ei[4] for ei in ei_list],
+    }
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(
+            *[fetch_by_ids(session, semaphore, ep, ep_ids) for ep, ep_ids in ids.items()]
+        )
+    found = dict(zip(ids, results))
+
     status = [StatusOut(id=2, name="killed", is_dead=True) for _ in range(4)] + [
         StatusOut(id=0, name="killer", is_dead=None)
     ]
     points = [ei[6] for ei in ei_list]
 
-    perks = []
-    addons = []
-    for ei in ei_list:
-        perks_add = await fetch_list("perks", ei[1])
-        perks.append(perks_add)
-        addons_add = await fetch_list("addons", ei[3])
-        addons.append(addons_add)
-
     return {
-        "characters": characters,
-        "perks": perks,
-        "item": item,
-        "addons": addons,
-        "offering": offering,
+        "characters": [found[EP.CHARACTER].get(ei[0]) for ei in ei_list],
+        "perks": [[found[EP.PERKS].get(id) for id in ei[1]] for ei in ei_list],
+        "item": [found[EP.ITEM].get(ei[2]) for ei in ei_list],
+        "addons": [[found[EP.ADDONS].get(id) for id in ei[3]] for ei in ei_list],
+        "offering": [found[EP.OFFERING].get(ei[4]) for ei in ei_list],
         "status": status,
         "points": points,
     }
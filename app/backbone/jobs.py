@@ -0,0 +1,289 @@
+"""Background jobs for the long-running processes (crop, extract, train and backup).
+
+Jobs are persisted in the jobs table and run in a bounded thread pool of
+`ST.jobs_max_workers` threads, each one with its own database session.
+
+Every process periodically renews the heartbeat of the unfinished jobs it owns,
+and recovers the jobs whose heartbeat is older than `ST.jobs_stale_after` seconds,
+since their process died: pending jobs are queued again, while running ones are
+marked as interrupted, because the processes aren't guaranteed to be resumable.
+
+On shutdown, a process stops taking jobs, leaving its pending ones to be recovered,
+but keeps beating its running jobs until they end.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import timedelta
+import os
+import socket
+from threading import Event, Lock, Thread
+import traceback
+from typing import TYPE_CHECKING, Any, Callable
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from backbone.config import ST
+from backbone.database import SessionLocal
+from backbone.exceptions import ValidationException
+from backbone.models.objects import Job
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+PENDING     = "pending"
+RUNNING     = "running"
+SUCCEEDED   = "succeeded"
+FAILED      = "failed"
+CANCELLED   = "cancelled"
+INTERRUPTED = "interrupted"
+
+UNFINISHED = [PENDING, RUNNING]
+
+JobFunction = Callable[..., Any]
+"""Function that runs a job, called with a session and the job params as kwargs."""
+
+_job_functions: dict[str, JobFunction] = {}
+_uninterruptible: set[str] = set()
+_current_job: ContextVar[int | None] = ContextVar("current_job", default=None)
+
+_executor: ThreadPoolExecutor | None = None
+_stop = Event()
+_stop.set()
+_running: set[int] = set()
+_running_lock = Lock()
+_idle = Event()
+_idle.set()
+
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+"""Name of this process, as the owner of the jobs it queues."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job whose cancellation was requested."""
+
+
+def register_job(
+    kind: str,
+    interruptible: bool = True,
+) -> Callable[[JobFunction], JobFunction]:
+    """Register the function that runs the jobs of a kind.
+    Jobs that are 'interruptible' call `raise_if_cancelled` between their steps,
+    while the rest can only be cancelled before they start.
+    """
+    def decorator(f: JobFunction) -> JobFunction:
+        _job_functions[kind] = f
+        if not interruptible:
+            _uninterruptible.add(kind)
+        return f
+    return decorator
+
+
+def is_accepting() -> bool:
+    return _executor is not None and not _stop.is_set()
+
+
+def submit_job(db: "Session", kind: str, params: dict) -> Job:
+    """Persist a new job and queue it. 'params' must be JSON-serializable."""
+    assert kind in _job_functions, f"Unknown job kind '{kind}'."
+    if not is_accepting():
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Background jobs aren't running.",
+        )
+
+    job = Job(kind=kind, status=PENDING, worker=WORKER, params=jsonable_encoder(params))
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _executor.submit(run_job, job.id)
+    return job
+
+
+def finish_job(db: "Session", id: int, job_status: str, **values) -> None:
+    """Set the final status of a job that this process is running,
+    unless it was taken over (i.e. marked as interrupted) in the meantime.
+    If the update fails, it's retried once after a rollback.
+    """
+    stmt = (
+        update(Job)
+        .where(Job.id == id, Job.status == RUNNING, Job.worker == WORKER)
+        .values(status=job_status, date_finished=func.now(), **values)
+    )
+    try:
+        db.execute(stmt)
+        db.commit()
+    except SQLAlchemyError:
+        traceback.print_exc()
+        db.rollback()
+        db.execute(stmt)
+        db.commit()
+
+
+def set_running(id: int, running: bool) -> None:
+    with _running_lock:
+        if running:
+            _running.add(id)
+            _idle.clear()
+        else:
+            _running.discard(id)
+            if not _running:
+                _idle.set()
+
+
+def run_job(id: int) -> None:
+    """Run a pending job, unless it was cancelled (or claimed) in the meantime."""
+    with SessionLocal() as db:
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == id, Job.status == PENDING, Job.worker == WORKER)
+            .values(status=RUNNING, date_started=func.now())
+            .returning(Job.kind, Job.params)
+        ).first()
+        db.commit()
+        if claimed is None:
+            return
+
+        kind, params = claimed
+        set_running(id, True)
+        token = _current_job.set(id)
+        try:
+            result = jsonable_encoder(_job_functions[kind](db, **params))
+        except JobCancelled:
+            db.rollback()
+            finish_job(db, id, CANCELLED)
+        except Exception as e:  # noqa: BLE001 - any error fails the job instead of the worker
+            traceback.print_exc()
+            db.rollback()
+            detail = getattr(e, "detail", None) or str(e)
+            finish_job(db, id, FAILED, error=f"{type(e).__name__}: {detail}")
+        else:
+            finish_job(db, id, SUCCEEDED, result=result)
+        finally:
+            _current_job.reset(token)
+            set_running(id, False)
+
+
+def raise_if_cancelled() -> None:
+    """Stop the current job if its cancellation was requested. Meant to be called
+    by the jobs between their steps, and a no-op outside of them.
+    """
+    id = _current_job.get()
+    if id is None:
+        return
+    with SessionLocal() as db:
+        if db.scalar(select(Job.cancel_requested).where(Job.id == id)):
+            raise JobCancelled
+
+
+def cancel_job(db: "Session", job: Job) -> Job:
+    """Cancel a pending job right away, or request a running one to stop."""
+    if job.status == PENDING:
+        db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == PENDING)
+            .values(status=CANCELLED, cancel_requested=True, date_finished=func.now())
+        )
+    elif job.status == RUNNING:
+        if job.kind in _uninterruptible:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT,
+                f"Job {job.id} ({job.kind}) can't be cancelled once it started.",
+            )
+        job.cancel_requested = True
+    else:
+        raise ValidationException(f"Job {job.id} already finished ({job.status}).")
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+# * Heartbeat and recovery
+
+
+def beat(db: "Session", statuses: list[str]) -> None:
+    db.execute(
+        update(Job)
+        .where(Job.worker == WORKER, Job.status.in_(statuses))
+        .values(date_heartbeat=func.now())
+    )
+    db.commit()
+
+
+def recover_jobs(db: "Session") -> list[int]:
+    """Take over the unfinished jobs of dead processes. Returns the requeued ids."""
+    stale = Job.date_heartbeat < func.now() - timedelta(seconds=ST.jobs_stale_after)
+    db.execute(
+        update(Job)
+        .where(Job.status == RUNNING, stale)
+        .values(
+            status=INTERRUPTED,
+            error="Interrupted by the shutdown of its process.",
+            date_finished=func.now(),
+        )
+    )
+    ids = db.scalars(
+        update(Job)
+        .where(Job.status == PENDING, stale)
+        .values(worker=WORKER, date_heartbeat=func.now())
+        .returning(Job.id)
+    ).all()
+    db.commit()
+
+    for id in ids:
+        _executor.submit(run_job, id)
+    return ids
+
+
+def heartbeat_loop(stop: Event) -> None:
+    """Beat and recover jobs until stopped, and then only beat the running jobs
+    until they end, so that they aren't taken over while they still run.
+    """
+    while True:
+        stopping = stop.is_set()
+        try:
+            with SessionLocal() as db:
+                if stopping:
+                    beat(db, [RUNNING])
+                else:
+                    beat(db, UNFINISHED)
+                    recover_jobs(db)
+        # The database may be down, or the executor shut down while recovering
+        except (SQLAlchemyError, RuntimeError):
+            traceback.print_exc()
+
+        if stopping:
+            if _idle.wait(ST.jobs_heartbeat):
+                return
+        else:
+            stop.wait(ST.jobs_heartbeat)
+
+
+def start_jobs() -> None:
+    """Start taking jobs, along with the heartbeat of this process,
+    which also recovers the orphaned jobs.
+    """
+    global _executor, _stop
+    assert ST.jobs_heartbeat < ST.jobs_stale_after
+    assert not is_accepting(), "Jobs are already running."
+
+    _executor = ThreadPoolExecutor(
+        max_workers=ST.jobs_max_workers,
+        thread_name_prefix="job",
+    )
+    # A new event, as the heartbeat of a previous start may still be stopping
+    _stop = Event()
+    Thread(target=heartbeat_loop, args=(_stop,), name="jobs-heartbeat", daemon=True).start()
+
+
+def stop_jobs() -> None:
+    """Stop taking jobs. The pending ones are left for another process to recover,
+    and the running ones are left to finish.
+    """
+    _stop.set()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,6 @@
 """SQLAlchemy model definitions for DBDIE related objects."""
 
+from sqlalchemy import JSON
 from sqlalchemy import Boolean as Bool
 from sqlalchemy import Column as C
 from sqlalchemy import Date
@@ -142,3 +143,31 @@ class Extractor(Base):
         server_default=text("now()"),
     )
     date_last_trained = C(Date, nullable=False)
+
+
+class Job(Base):
+    """SQLAlchemy background job model."""
+    __tablename__ = TN.JOBS
+
+    id     = C(Int, nullable=False, primary_key=True)
+    kind   = C(Str, nullable=False)
+    status = C(Str, nullable=False)
+    worker = C(Str, nullable=False)
+
+    params           = C(JSON, nullable=False)
+    result           = C(JSON, nullable=True)
+    error            = C(Str,  nullable=True)
+    cancel_requested = C(Bool, nullable=False, server_default=text("false"))
+
+    date_created = C(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=text("now()"),
+    )
+    date_started   = C(TIMESTAMP(timezone=True), nullable=True)
+    date_finished  = C(TIMESTAMP(timezone=True), nullable=True)
+    date_heartbeat = C(
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=text("now()"),
+    )
@@ -33,6 +33,10 @@ CROP          : "Endpoint" = "/crop"
 EXTRACT       : "Endpoint" = "/extract"
 BACKUP        : "Endpoint" = "/backup"
 TRAIN         : "Endpoint" = "/train"
+JOBS          : "Endpoint" = "/jobs"
+
+MAX_BULK_IDS = 1_000
+"""Max amount of ids per request to the '/bulk' endpoints."""
 
 MT_TO_ENDPOINT: dict["ModelType", "Endpoint"] = {
     MT.ADDONS: ADDONS,
@@ -14,6 +14,7 @@ EXTRACTOR        : "TableName" = "extractor"
 FULL_MODEL_TYPES : "TableName" = "full_model_types"
 ITEM             : "TableName" = "item"
 ITEM_TYPES       : "TableName" = "item_types"
+JOBS             : "TableName" = "jobs"
 LABELS           : "TableName" = "labels"
 MATCHES          : "TableName" = "matches"
 MODEL            : "TableName" = "model"
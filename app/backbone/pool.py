@@ -0,0 +1,85 @@
+"""Instrumented connection pools, to see pool starvation under load."""
+
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Checkout statistics of a connection pool."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_checkout_s = 0.0
+        self.max_checkout_s = 0.0
+
+    def record_checkout(self, elapsed_s: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.waits += int(waited)
+            self.total_checkout_s += elapsed_s
+            self.max_checkout_s = max(self.max_checkout_s, elapsed_s)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_checkout_ms": (
+                    1000.0 * self.total_checkout_s / self.checkouts
+                    if self.checkouts > 0 else 0.0
+                ),
+                "max_checkout_ms": 1000.0 * self.max_checkout_s,
+            }
+
+
+class InstrumentedPoolMixin:
+    """Mixin for QueuePools that records the latency of each checkout,
+    and whether it had to wait for a connection to be returned.
+    """
+
+    stats: PoolStats
+
+    def _do_get(self):
+        waited = (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+        start = perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(perf_counter() - start, waited)
+        return conn
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def pool_status(pool: InstrumentedPoolMixin) -> dict:
+    """Current usage of the pool along with its checkout statistics."""
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    } | pool.stats.to_dict()
@@ -5,21 +5,18 @@ from fastapi import APIRouter, Depends, Response, status
 
 from dbdie_classes.schemas.helpers import DBDVersionCreate, DBDVersionOut
 
+from backbone.cache import bump_version
 from backbone.database import get_db
 from backbone.endpoints import (
-    add_commit_refresh,
     delete_one,
     do_count,
     filter_one,
     get_id,
     get_many,
-    get_req,
-    getr,
-    NOT_WS_PATT,
 )
-from backbone.exceptions import ValidationException
 from backbone.models.helpers import DBDVersion
-from backbone.options import ENDPOINTS as EP
+from backbone.options import TABLE_NAMES as TN
+from backbone.services import insert_dbdv
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -70,15 +67,7 @@ def create_dbdv(
     db: "Session" = Depends(get_db),
 ):
     """Create DBD version."""
-    if NOT_WS_PATT.search(dbdv.name) is None:
-        raise ValidationException("DBD version name can't be empty")
-
-    new_dbdv = {"id": getr(f"{EP.DBD_VERSION}/count") + 1} | dbdv.model_dump()
-    new_dbdv = DBDVersion(**new_dbdv)
-
-    add_commit_refresh(db, new_dbdv)
-
-    return get_req(EP.DBD_VERSION, new_dbdv.id)
+    return insert_dbdv(db, dbdv)
 
 
 @router.put("/{id}", status_code=status.HTTP_200_OK)
@@ -93,6 +82,7 @@ def update_dbdv(
     new_info = {"id": id} | dbdv.model_dump()
     dbdv_query.update(new_info, synchronize_session=False)
     db.commit()
+    bump_version(TN.DBD_VERSION)
 
     return Response(status_code=status.HTTP_200_OK)
 
@@ -13,13 +13,12 @@ from backbone.endpoints import (
     do_count,
     filter_one,
     get_many,
-    get_req,
     postr,
     update_one,
 )
 from backbone.exceptions import ValidationException
 from backbone.models.objects import CropperSwarm
-from backbone.options import ENDPOINTS as EP
+from backbone.services import fetch_one
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -68,7 +67,10 @@ def create_cropper_swarm(
     new_cropper_swarm = CropperSwarm(**new_cropper_swarm)
     add_commit_refresh(db, new_cropper_swarm)
 
-    resp = get_req(EP.CROPPER_SWARM, new_cropper_swarm.id)
+    resp = CropperSwarmOut.model_validate(
+        fetch_one(db, CropperSwarm, new_cropper_swarm.id),
+        from_attributes=True,
+    ).model_dump(mode="json")
 
     postr("/crop/register", ml=True, json=resp)
 
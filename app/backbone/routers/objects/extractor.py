@@ -14,14 +14,13 @@ from backbone.endpoints import (
     filter_one,
     get_id,
     get_many,
-    get_req,
     update_many,
     update_one,
 )
 from backbone.exceptions import ValidationException
 from backbone.models.groupings import Labels
 from backbone.models.objects import Extractor
-from backbone.options import ENDPOINTS as EP
+from backbone.services import fetch_one
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -82,8 +81,7 @@ def create_extractor(
     new_extractor = Extractor(**new_extractor)
     add_commit_refresh(db, new_extractor)
 
-    resp = get_req(EP.EXTRACTOR, new_extractor.id)
-    return resp
+    return ExtractorOut.from_sqla(fetch_one(db, Extractor, new_extractor.id))
 
 
 @router.put("/{id}", status_code=status.HTTP_200_OK)
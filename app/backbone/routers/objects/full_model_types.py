@@ -4,8 +4,10 @@ from typing import TYPE_CHECKING
 
 from fastapi import APIRouter, Depends, status
 
+from dbdie_classes.base import FullModelType as FMT
 from dbdie_classes.schemas.objects import FullModelTypeOut
 
+from backbone.code.fmts import count_fmts_classes
 from backbone.database import get_db
 from backbone.endpoints import (
     delete_one,
@@ -31,6 +33,15 @@ def count_fmts(
     return do_count(db, FullModelType, text=text)
 
 
+@router.post("/counts", response_model=dict[FMT, int])
+def get_fmts_counts(
+    fmts: list[FMT],
+    db: "Session" = Depends(get_db),
+):
+    """Count the classes of many FullModelTypes at once, with a single query."""
+    return count_fmts_classes(db, fmts)
+
+
 @router.get("", response_model=list[FullModelTypeOut])
 def get_fmts(
     limit: int = 10,
@@ -14,12 +14,11 @@ from backbone.endpoints import (
     filter_one,
     get_id,
     get_many,
-    get_req,
     update_one,
 )
 from backbone.exceptions import ValidationException
 from backbone.models.objects import Model
-from backbone.options import ENDPOINTS as EP
+from backbone.services import fetch_one
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
@@ -76,8 +75,7 @@ def create_model(
     new_model = Model(**new_model)
     add_commit_refresh(db, new_model)
 
-    resp = get_req(EP.MODELS, new_model.id)
-    return resp
+    return fetch_one(db, Model, new_model.id)
 
 
 @router.put("/{id}", status_code=status.HTTP_200_OK)
@@ -3,27 +3,25 @@
 from typing import TYPE_CHECKING
 from dbdie_classes.schemas.predictables import AddonCreate, AddonOut
 from dbdie_classes.schemas.types import AddonTypeOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
-    dbdv_str_to_id,
     delete_one,
     do_count,
-    filter_one,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
     get_types,
-    getr,
+    search_async,
 )
-from backbone.exceptions import ValidationException
 from backbone.models.predictables import Addon, AddonType
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.services import insert_addon
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -39,13 +37,16 @@ def count_addons(
 
 
 @router.get("", response_model=list[AddonOut])
-def get_addons(
+async def get_addons(
     limit: int = 10,
     skip: int = 0,
     ifk: bool | None = None,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    return get_many(db, limit, Addon, skip, ifk, AddonType)
+    return fast_response(
+        AddonOut,
+        await get_many_cached(adb, limit, Addon, skip, ifk, AddonType),
+    )
 
 
 @router.get("/types", response_model=list[AddonTypeOut])
@@ -53,30 +54,57 @@ def get_addons_types(db: "Session" = Depends(get_db)):
     return get_types(db, AddonType)
 
 
-@router.get("/{id}", response_model=AddonOut)
-def get_addon(id: int, db: "Session" = Depends(get_db)):
-    return filter_one(db, Addon, id, "Addon")[0]
+@router.get("/icons/atlas")
+def get_addon_icons_atlas(request: Request):
+    return get_atlas_image("addons", request)
 
 
-@router.get("/{id}/icon")
-def get_addon_icon(id: int):
-    return get_icon("addons", id)
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_addon_icons_atlas_index():
+    return get_atlas_index("addons")
 
 
-@router.post("", response_model=AddonOut, status_code=status.HTTP_201_CREATED)
-def create_addon(addon: AddonCreate, db: "Session" = Depends(get_db)):
-    if NOT_WS_PATT.search(addon.name) is None:
-        raise ValidationException("Addon name can't be empty")
+@router.get("/search", response_model=list[AddonOut])
+async def search_addons(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await search_async(adb, Addon, q, limit)
 
-    get_req(EP.ITEM, addon.item_id)
-    # TODO: assert type_id exists
 
-    new_addon = {"id": getr(f"{EP.ADDONS}/count")} | addon.model_dump()
-    new_addon = Addon(**new_addon)
+@router.get("/bulk", response_model=BulkOut[AddonOut])
+async def get_addons_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Addon, ids, AddonType)
 
-    add_commit_refresh(db, new_addon)
 
-    return get_req(EP.ADDONS, new_addon.id)
+@router.post("/bulk", response_model=BulkOut[AddonOut])
+async def post_addons_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Addon, ids, AddonType)
+
+
+@router.get("/{id}", response_model=AddonOut)
+async def get_addon(id: int, adb: "AsyncSession" = Depends(get_async_db)):
+    return fast_response(
+        AddonOut,
+        await fetch_one_cached(adb, Addon, id, "Addon", AddonType),
+    )
+
+
+@router.get("/{id}/icon")
+def get_addon_icon(id: int, request: Request):
+    return get_icon("addons", id, request=request)
+
+
+@router.post("", response_model=AddonOut, status_code=status.HTTP_201_CREATED)
+def create_addon(addon: AddonCreate, db: "Session" = Depends(get_db)):
+    return insert_addon(db, addon)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
@@ -12,31 +12,31 @@ from dbdie_classes.schemas.predictables import (
     CharacterCreate,
     CharacterOut,
 )
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
 from backbone.code.characters import (
     create_addons,
     create_killer_power,
     create_perks,
 )
-from backbone.database import get_db
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
     delete_one,
     do_count,
-    filter_one,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
-    getr,
-    postr,
+    search_async,
 )
-from backbone.exceptions import ItemNotFoundException, ValidationException
+from backbone.exceptions import ItemNotFoundException
 from backbone.models.predictables import Addon, Character, Item, Perk
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.services import insert_character
+from backbone.sqla import object_as_dict
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -53,26 +53,69 @@ def count_characters(
 
 
 @router.get("", response_model=list[CharacterOut])
-def get_characters(
+async def get_characters(
     ifk: bool | None = None,
     limit: int = 10,
     skip: int = 0,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
     """Query many DBD characters."""
-    return get_many(db, limit, Character, skip, ifk)
+    return fast_response(
+        CharacterOut,
+        await get_many_cached(adb, limit, Character, skip, ifk),
+    )
+
+
+@router.get("/icons/atlas")
+def get_character_icons_atlas(request: Request):
+    """Get all the DBD character icons packed in a single image."""
+    return get_atlas_image("characters", request)
+
+
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_character_icons_atlas_index():
+    """Get the position of each DBD character icon in the icons atlas."""
+    return get_atlas_index("characters")
+
+
+@router.get("/search", response_model=list[CharacterOut])
+async def search_characters(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Fuzzy search DBD characters by name, ranked by similarity."""
+    return await search_async(adb, Character, q, limit)
+
+
+@router.get("/bulk", response_model=BulkOut[CharacterOut])
+async def get_characters_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Get many DBD characters by their IDs, in the same order."""
+    return await fetch_many_cached(adb, Character, ids)
+
+
+@router.post("/bulk", response_model=BulkOut[CharacterOut])
+async def post_characters_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Same as the GET version, but with the IDs in the body."""
+    return await fetch_many_cached(adb, Character, ids)
 
 
 @router.get("/{id}", response_model=CharacterOut)
-def get_character(id: int, db: "Session" = Depends(get_db)):
+async def get_character(id: int, adb: "AsyncSession" = Depends(get_async_db)):
     """Get a DBD character with an ID."""
-    return filter_one(db, Character, id)[0]
+    return fast_response(CharacterOut, await fetch_one_cached(adb, Character, id))
 
 
 @router.get("/{id}/icon")
-def get_character_icon(id: int):
+def get_character_icon(id: int, request: Request):
     """Get a DBD character icon."""
-    return get_icon("characters", id)
+    return get_icon("characters", id, request=request)
 
 
 @router.get("/full/{id}", response_model=FullCharacterOut)
@@ -112,47 +155,35 @@ def create_character(
     db: "Session" = Depends(get_db),
 ):
     """Create a DBD character."""
-    if NOT_WS_PATT.search(character.name) is None:
-        raise ValidationException("Character name can't be empty")
-
-    new_character = {
-        "id": (
-            getr(f"{EP.CHARACTER}/count", params={"ifk": True})
-            + getr(f"{EP.CHARACTER}/count", params={"ifk": False})
-            - 1  # TODO: Fix character count so that it is more intuitive
-        ),
-    } | character.model_dump()
-
-    new_character = Character(**new_character)
-    add_commit_refresh(db, new_character)
-
-    resp = get_req(EP.CHARACTER, new_character.id)
-    return resp
+    return insert_character(db, character)
 
 
 @router.post("/full", response_model=FullCharacterOut, status_code=status.HTTP_201_CREATED)
-def create_character_full(character: FullCharacterCreate):
+def create_character_full(
+    character: FullCharacterCreate,
+    db: "Session" = Depends(get_db),
+):
     """Create a DBD character in full (with its perks and addons, if applies)."""
-    payload = {
-        "name": character.name,
-        "ifk": character.ifk,
-        "base_char_id": None,
-        "dbdv_id": character.dbdv_id,
-        "common_name": character.common_name,
-        "emoji": character.emoji,
-        "power_id": None,
-    }
-    character_only = postr(EP.CHARACTER, json=payload)
+    character_only = CharacterCreate(
+        name=character.name,
+        ifk=character.ifk,
+        base_char_id=None,
+        dbdv_id=character.dbdv_id,
+        common_name=character.common_name,
+        emoji=character.emoji,
+        power_id=None,
+    )
+    character_only = object_as_dict(insert_character(db, character_only))
 
-    power = create_killer_power(character_only, character.power_name)
+    power = create_killer_power(db, character_only, character.power_name)
     power_id = power["id"] if power is not None else None
     # TODO: Update killer's power_id (if ifk)
 
     return {
         "character": character_only,
         "power": power,
-        "perks": create_perks(character_only, character.perk_names),
-        "addons": create_addons(character_only, character.addon_names, power_id),
+        "perks": create_perks(db, character_only, character.perk_names),
+        "addons": create_addons(db, character_only, character.addon_names, power_id),
     }
 
 
@@ -3,26 +3,25 @@
 from typing import TYPE_CHECKING
 from dbdie_classes.schemas.predictables import ItemCreate, ItemOut
 from dbdie_classes.schemas.types import ItemTypeOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
     delete_one,
     do_count,
-    filter_one,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
     get_types,
-    getr,
+    search_async,
 )
-from backbone.exceptions import ValidationException
 from backbone.models.predictables import Item, ItemType
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.services import insert_item
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -38,13 +37,16 @@ def count_items(
 
 
 @router.get("", response_model=list[ItemOut])
-def get_items(
+async def get_items(
     limit: int = 10,
     skip: int = 0,
     ifk: bool | None = None,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    return get_many(db, limit, Item, skip, ifk, ItemType)
+    return fast_response(
+        ItemOut,
+        await get_many_cached(adb, limit, Item, skip, ifk, ItemType),
+    )
 
 
 @router.get("/types", response_model=list[ItemTypeOut])
@@ -52,29 +54,57 @@ def get_item_types(db: "Session" = Depends(get_db)):
     return get_types(db, ItemType)
 
 
-@router.get("/{id}", response_model=ItemOut)
-def get_item(id: int, db: "Session" = Depends(get_db)):
-    return filter_one(db, Item, id)[0]
+@router.get("/icons/atlas")
+def get_item_icons_atlas(request: Request):
+    return get_atlas_image("items", request)
 
 
-@router.get("/{id}/icon")
-def get_item_icon(id: int):
-    return get_icon("items", id)
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_item_icons_atlas_index():
+    return get_atlas_index("items")
 
 
-@router.post("", response_model=ItemOut, status_code=status.HTTP_201_CREATED)
-def create_item(item: ItemCreate, db: "Session" = Depends(get_db)):
-    if NOT_WS_PATT.search(item.name) is None:
-        raise ValidationException("Item name can't be empty")
+@router.get("/search", response_model=list[ItemOut])
+async def search_items(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await search_async(adb, Item, q, limit)
 
-    # TODO: assert type_id exists
 
-    new_item = {"id": getr(f"{EP.ITEM}/count")} | item.model_dump()
-    new_item = Item(**new_item)
+@router.get("/bulk", response_model=BulkOut[ItemOut])
+async def get_items_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Item, ids, ItemType)
 
-    add_commit_refresh(db, new_item)
 
-    return get_req(EP.ITEM, new_item.id)
+@router.post("/bulk", response_model=BulkOut[ItemOut])
+async def post_items_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Item, ids, ItemType)
+
+
+@router.get("/{id}", response_model=ItemOut)
+async def get_item(id: int, adb: "AsyncSession" = Depends(get_async_db)):
+    return fast_response(
+        ItemOut,
+        await fetch_one_cached(adb, Item, id, mt_type=ItemType),
+    )
+
+
+@router.get("/{id}/icon")
+def get_item_icon(id: int, request: Request):
+    return get_icon("items", id, request=request)
+
+
+@router.post("", response_model=ItemOut, status_code=status.HTTP_201_CREATED)
+def create_item(item: ItemCreate, db: "Session" = Depends(get_db)):
+    return insert_item(db, item)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
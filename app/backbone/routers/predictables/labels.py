@@ -4,13 +4,10 @@ import os
 from typing import TYPE_CHECKING
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import ORJSONResponse
 
 from dbdie_classes.base import Filename, FullModelType
-from dbdie_classes.code.groupings import (
-    labels_model_to_checks,
-    labels_model_to_labeled_predictables,
-)
 from dbdie_classes.options import KILLER_FMT, SURV_FMT
 from dbdie_classes.options.FMT import ALL as ALL_FMT
 from dbdie_classes.options.MODEL_TYPE import MULTIPLE_PER_PLAYER
@@ -22,27 +19,49 @@ from dbdie_classes.schemas.groupings import (
     PlayerIn,
 )
 
+from backbone.cache import bump_version
+from backbone.code.exports import (
+    ExportFormat,
+    StreamFormat,
+    export_labels_response,
+    export_select,
+    stream_rows_response,
+)
+from backbone.code.extract import get_zip
 from backbone.code.labels import (
+    bulk_update_labels_strict,
     concat_player_types,
+    do_count_labels,
     filter_one_labels_row,
     get_dfs_dict,
-    get_filtered_query,
+    get_labels_stats,
+    get_filtered_select,
     handle_mpp_crops,
     handle_opp_crops,
+    insert_empty_labels,
     join_dfs,
+    labels_out_cols,
     player_to_labels,
     post_labels,
     process_fmt_strict,
     process_joined_df,
 )
-from backbone.database import get_db
-from backbone.endpoints import add_commit_refresh, getr
-from backbone.exceptions import HTTPException
+from backbone.database import get_async_db, get_db
+from backbone.endpoints import (
+    add_commit_refresh,
+    dbdv_str_to_id,
+    get_ids,
+    set_next_cursor,
+)
+from backbone.exceptions import HTTPException, ValidationException
 from backbone.models.groupings import Labels, Match
-from backbone.options import ENDPOINTS as EP
-from backbone.sqla import limit_and_skip
+from backbone.options import TABLE_NAMES as TN
+from backbone.schemas import EmptyLabelsReport, LabelsBulkReport, LabelsPredictions
+from backbone.services import fetch_labels
+from backbone.sqla import paginate
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -52,17 +71,29 @@ router = APIRouter()
 def count_labels(
     ifk: bool | None = None,
     manual_checks: ManualChecksIn | None = None,
+    estimate: bool = False,
     db: "Session" = Depends(get_db),
 ):
-    """Count player-centered labels."""
-    query = get_filtered_query(
-        ifk,
-        manual_checks,
-        default_cols=[Labels.match_id],
-        force_prepend_default_cols=False,
-        db=db,
-    )
-    return query.count()
+    """Count player-centered labels.
+    With `estimate`, unfiltered counts use the planner statistics instead.
+    """
+    return do_count_labels(db, ifk, manual_checks, estimate)
+
+
+@router.get("/stats", response_model=dict[FullModelType, list[int]])
+def get_labels_class_stats(
+    fmts: list[FullModelType] | None = Query(None),
+    manual_checks: ManualChecksIn | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """Class histograms of the labels, as counts indexed by class id for each fmt
+    (all of them by default), computed in the database.
+    """
+    if fmts is None:
+        fmts = ALL_FMT
+    elif not fmts or not all(fmt in ALL_FMT for fmt in fmts):
+        raise ValidationException("Unknown full model types.")
+    return get_labels_stats(db, fmts, manual_checks)
 
 
 # TODO: Debug the filter so that it is more helpful and convenient
@@ -71,37 +102,72 @@ def count_labels(
     response_model=list[LabelsOut],
     status_code=status.HTTP_200_OK,
 )
-def get_labels(
+async def get_labels(
     ifk: bool | None = None,
     manual_checks: ManualChecksIn | None = None,
     limit: int = 10,
     skip: int = 0,
-    db: "Session" = Depends(get_db),
+    after: str | None = None,
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    """Get many player-centered labels."""
+    """Get many player-centered labels. For deep pages, pass `after` (empty for
+    the first page) instead of `skip`, and then the `X-Next-Cursor` response header.
+    """
     assert limit > 0
 
-    query = get_filtered_query(
+    stmt = get_filtered_select(
         ifk,
         manual_checks,
-        default_cols=(
-            [
-                Labels.match_id,
-                Labels.player_id,
-                Labels.date_modified,
-                Labels.user_id,
-                Labels.extr_id,
-            ]
-            + labels_model_to_labeled_predictables(Labels)
-            + labels_model_to_checks(Labels)
-        ),
+        default_cols=labels_out_cols(),
         force_prepend_default_cols=True,
-        db=db,
     )
-    labels = limit_and_skip(query, limit, skip).all()
+    key_cols = [Labels.match_id, Labels.player_id]
+    labels = (await adb.execute(paginate(stmt, limit, skip, after, key_cols))).all()
 
-    labels = [LabelsOut.from_labels(lbl) for lbl in labels]
-    return labels
+    # LabelsOut are built by our own code, so FastAPI doesn't need to revalidate them
+    resp = ORJSONResponse([LabelsOut.from_labels(lbl).model_dump() for lbl in labels])
+    if after is not None:
+        set_next_cursor(resp, labels, limit, key_names=("match_id", "player_id"))
+    return resp
+
+
+@router.post("/filter-many/stream", status_code=status.HTTP_200_OK)
+def stream_labels(
+    file_format: StreamFormat = "ndjson",
+    ifk: bool | None = None,
+    manual_checks: ManualChecksIn | None = None,
+):
+    """Streaming version of `/filter-many` without pagination, that runs in constant memory.
+    NDJSON lines are `LabelsOut` objects, while CSV rows are the flat labels rows.
+    """
+    stmt = get_filtered_select(
+        ifk,
+        manual_checks,
+        default_cols=labels_out_cols(),
+        force_prepend_default_cols=True,
+    ).order_by(Labels.match_id, Labels.player_id)
+    return stream_rows_response(
+        file_format,
+        stmt,
+        lambda row: LabelsOut.from_labels(row).model_dump(),
+    )
+
+
+@router.post("/export", status_code=status.HTTP_200_OK)
+def export_labels(
+    file_format: ExportFormat = "parquet",
+    ifk: bool | None = None,
+    manual_checks: ManualChecksIn | None = None,
+    extr_id: int | None = None,
+    dbdv: str | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """Export player-centered labels in a columnar format, streamed in chunks:
+    Parquet, an Arrow IPC stream, or a .npz of integer arrays (with -1 for nulls).
+    """
+    dbdv_id = None if dbdv is None else dbdv_str_to_id(db, dbdv)
+    stmt = export_select(ifk, manual_checks, extr_id, dbdv_id)
+    return export_labels_response(file_format, stmt)
 
 
 @router.get("/filter", response_model=LabelsOut)
@@ -111,9 +177,7 @@ def get_label(
     db: "Session" = Depends(get_db),
 ):
     """Get player-centered labels with (match_id, player_id)."""
-    labels, _ = filter_one_labels_row(db, match_id, player_id)
-    labels = LabelsOut.from_labels(labels)
-    return labels
+    return fetch_labels(db, match_id, player_id)
 
 
 @router.post("", response_model=LabelsOut, status_code=status.HTTP_201_CREATED)
@@ -129,16 +193,14 @@ def create_labels(
 
     add_commit_refresh(db, new_labels)
 
-    return getr(
-        f"{EP.LABELS}/filter",
-        params={
-            "match_id": new_labels.match_id,
-            "player_id": new_labels.player_id,
-        },
-    )
+    return fetch_labels(db, new_labels.match_id, new_labels.player_id)
 
 
-@router.post("/init-empty", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/init-empty",
+    response_model=EmptyLabelsReport,
+    status_code=status.HTTP_201_CREATED,
+)
 def create_empty_labels(db: "Session" = Depends(get_db)):
     """Create empty labels for crops that exist but aren't registered yet.
     This is useful so that they can later be manually or automatically labeled.
@@ -153,29 +215,25 @@ def create_empty_labels(db: "Session" = Depends(get_db)):
             detail="No match image was found in the 'cropped' folder.",
         )
 
-    # Fetch all match_ids & filenames that are present in 'matches' but have no labels in 'labels'
-    found_ms = (
-        db.query(
-            Match.id,
-        )
-        .join(Labels)
-        .distinct()
-        .all()
-    )
-    found_ms = set(m[0] for m in found_ms)
-    
-
-    # With that information, loop the matches/crops that match those filenames and upload with POST
-    # TODO: Implement
-    for m in ms:
-        for fmt in fmts:
-            ...
+    # Resolve the filenames to their match ids, and insert in a single statement
+    # the player rows that don't have labels yet
+    ids = get_ids(db, Match, fs, name_col="filename")
+    labels_created = insert_empty_labels(db, list(ids.values()))
 
-    return Response(status_code=status.HTTP_201_CREATED)
+    return {
+        "files": len(fs),
+        "matches": len(ids),
+        "unregistered_files": len(fs) - len(ids),
+        "labels_created": labels_created,
+    }
 
 
 @router.post("/batch", status_code=status.HTTP_201_CREATED)
-def batch_create_labels(fmts: list[FullModelType], filename: Filename):
+def batch_create_labels(
+    fmts: list[FullModelType],
+    filename: Filename,
+    db: "Session" = Depends(get_db),
+):
     """Create player-centered labels from label CSVs ('filename').
 
     NOTE: This is not an image nor crop filename, but a CSV with labels.
@@ -221,9 +279,9 @@ def batch_create_labels(fmts: list[FullModelType], filename: Filename):
     }
 
     joined_df = join_dfs(dfs)
-    joined_df = process_joined_df(joined_df)
+    joined_df = process_joined_df(db, joined_df)
 
-    post_labels(joined_df)
+    post_labels(db, joined_df)
 
     return Response(status_code=status.HTTP_201_CREATED)
 
@@ -256,10 +314,37 @@ def update_labels_strict(
 
     filter_query.update(updated_info, synchronize_session=False)
     db.commit()
+    bump_version(TN.LABELS)
 
     return Response(status_code=status.HTTP_200_OK)
 
 
+@router.put(
+    "/predictable/strict/batch",
+    response_model=LabelsBulkReport,
+    status_code=status.HTTP_200_OK,
+)
+def update_labels_strict_batch(
+    fmt: FullModelType,
+    preds: LabelsPredictions,
+    user_id: int,
+    extr_id: int,
+    batch_size: int | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """Bulk version of the strict update, for all the predictions of a full model type.
+    If no `batch_size` is given, everything is written in a single transaction.
+    """
+    return bulk_update_labels_strict(
+        db,
+        fmt,
+        get_zip(preds.model_dump()),
+        user_id=user_id,
+        extr_id=extr_id,
+        batch_size=batch_size,
+    )
+
+
 # TODO: Deprecate this strict implementation if the previous one is more correct
 @router.put("/predictable", status_code=status.HTTP_200_OK)
 def update_labels(
@@ -289,6 +374,7 @@ def update_labels(
 
     filter_query.update(new_info, synchronize_session=False)
     db.commit()
+    bump_version(TN.LABELS)
 
     return Response(status_code=status.HTTP_200_OK)
 
@@ -302,4 +388,5 @@ def delete_labels(
     item, _ = filter_one_labels_row(db, match_id, player_id)
     db.delete(item)
     db.commit()
+    bump_version(TN.LABELS)
     return Response(status_code=status.HTTP_200_OK)
@@ -9,31 +9,43 @@ from dbdie_classes.schemas.groupings import (
     MatchOut,
     VersionedFolderUpload,
 )
-from fastapi import APIRouter, Depends, Response, status
-from fastapi.exceptions import HTTPException
-from traceback import print_exc
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy import select
 
+from backbone.cache import bump_version
+from backbone.code.exports import StreamFormat, stream_rows_response
 from backbone.code.matches import (
-    form_match, get_versioned_fd_data, upload_dbdv_matches
+    get_match_rendition,
+    get_versioned_fd_data,
+    get_versioned_fds,
+    read_journal,
+    recover_dbdv_matches,
+    upload_dbdv_matches,
 )
-from backbone.database import get_db
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
+    dbdv_str_to_id,
     delete_one,
     do_count,
+    fast_response,
     filter_one,
+    filter_one_async,
     get_id,
-    get_many,
+    get_ids,
+    get_many_async,
     get_match_img,
-    get_req,
-    getr,
+    search_async,
+    set_next_cursor,
 )
 from backbone.exceptions import ValidationException
 from backbone.models.groupings import Match
-from backbone.options import ENDPOINTS as EP
-from backbone.sqla import object_as_dict
+from backbone.options import TABLE_NAMES as TN
+from backbone.schemas import FilenameIdsOut
+from backbone.services import fetch_one, insert_match
+from backbone.sqla import filter_with_text, object_as_dict
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -42,18 +54,30 @@ router = APIRouter()
 @router.get("/count", response_model=int)
 def count_matches(
     text: str = "",
+    estimate: bool = False,
     db: "Session" = Depends(get_db),
 ):
-    return do_count(db, Match, text=text)
+    """Count DBD matches.
+    With `estimate`, unfiltered counts use the planner statistics instead.
+    """
+    return do_count(db, Match, text=text, estimate=estimate)
 
 
 @router.get("", response_model=list[MatchOut])
-def get_matches(
+async def get_matches(
     limit: int = 10,
     skip: int = 0,
-    db: "Session" = Depends(get_db),
+    after: str | None = None,
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    return get_many(db, limit, Match, skip)
+    """Get many DBD matches. For deep pages, pass `after` (empty for the first page)
+    instead of `skip`, and then the `X-Next-Cursor` response header of each page.
+    """
+    matches = await get_many_async(adb, limit, Match, skip, after=after)
+    resp = fast_response(MatchOut, [object_as_dict(m) for m in matches])
+    if after is not None:
+        set_next_cursor(resp, matches, limit)
+    return resp
 
 
 @router.get("/id", response_model=int)
@@ -64,18 +88,62 @@ def get_match_id(
     return get_id(db, Match, "Match", filename, name_col="filename")
 
 
+@router.post("/ids", response_model=FilenameIdsOut)
+def get_match_ids(
+    filenames: list[str],
+    db: "Session" = Depends(get_db),
+):
+    """Get the match ids of many filenames at once."""
+    ids = get_ids(db, Match, filenames, name_col="filename")
+    return {
+        "ids": ids,
+        "missing": [f for f in dict.fromkeys(filenames) if f not in ids],
+    }
+
+
 @router.get("/image/{id}")
-def get_match_image(id: int):
-    m = getr(f"{EP.MATCHES}/{id}")
-    return get_match_img(m["filename"])
+def get_match_image(
+    id: int,
+    request: Request,
+    w: int | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """Get the image of a DBD match. If the width `w` is provided, a downscaled
+    rendition at least as wide is returned (240, 480, 960 or full size).
+    """
+    m = fetch_one(db, Match, id, "Match")
+    if w is not None:
+        return get_match_rendition(m.filename, w, request)
+    return get_match_img(m.filename, request=request)
+
+
+@router.get("/search", response_model=list[MatchOut])
+async def search_matches(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Fuzzy search DBD matches by filename, ranked by similarity."""
+    return await search_async(adb, Match, q, limit)
+
+
+@router.get("/stream")
+def stream_matches(file_format: StreamFormat = "ndjson", text: str = ""):
+    """Stream all DBD matches (filtered by filename) as NDJSON or CSV,
+    in constant memory and without pagination.
+    """
+    stmt = filter_with_text(select(*Match.__table__.columns), Match, text)
+    return stream_rows_response(
+        file_format,
+        stmt.order_by(Match.id),
+        lambda row: MatchOut.model_construct(**row._mapping).model_dump(),
+    )
 
 
 @router.get("/{id}", response_model=MatchOut)
-def get_match(id: int, db: "Session" = Depends(get_db)):
-    m = filter_one(db, Match, id, "Match")[0]
-    m = object_as_dict(m)
-    m = MatchOut(**m)
-    return m
+async def get_match(id: int, adb: "AsyncSession" = Depends(get_async_db)):
+    m = await filter_one_async(adb, Match, id, "Match")
+    return fast_response(MatchOut, object_as_dict(m))
 
 
 @router.post("", response_model=MatchOut, status_code=status.HTTP_201_CREATED)
@@ -83,28 +151,7 @@ def create_match(
     match_create: MatchCreate,
     db: "Session" = Depends(get_db),
 ):
-    if NOT_WS_PATT.search(match_create.filename) is None:
-        raise ValidationException("Match filename can't be empty")
-
-    new_match = form_match(match_create)
-    new_match = Match(**new_match)
-
-    db.add(new_match)
-    try:
-        db.commit()
-    except Exception as e:
-        print_exc(e)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            (
-                "There was an error commiting the match. "
-                + "Make sure you are not reuploading an image with an existing filename."
-            ),
-        ) from e
-    db.refresh(new_match)
-
-    resp = get_req(EP.MATCHES, new_match.id)
-    return resp
+    return insert_match(db, match_create.model_dump())
 
 
 @router.post(
@@ -112,19 +159,36 @@ def create_match(
     response_model=list[MatchOut],
     status_code=status.HTTP_201_CREATED,
 )
-def upload_versioned_folder(v_folder: VersionedFolderUpload):
+def upload_versioned_folder(
+    v_folder: VersionedFolderUpload,
+    rollback: bool = False,
+    db: "Session" = Depends(get_db),
+):
     """Upload DBD-versioned folder that resides in the folder 'versioned',
     and move its matches to 'pending' folder.
+
+    If a previous upload of the folder was interrupted, it is resumed,
+    or undone if `rollback` is True.
     """
     # Assert DBD version already exists
-    dbdv_id = getr(
-        f"{EP.DBD_VERSION}/id",
-        params={"dbdv_str": v_folder.dbdv_name},
-    )
+    dbdv_id = dbdv_str_to_id(db, v_folder.dbdv_name)
+
+    src_fd, _ = get_versioned_fds(v_folder.dbdv_name)
+    journal = read_journal(src_fd)
+    if journal is not None:
+        matches = recover_dbdv_matches(db, journal, src_fd, rollback)
+        if rollback:
+            return []
+        elif matches is not None:
+            os.rmdir(src_fd)
+            return matches
+    elif rollback:
+        raise ValidationException("There is no interrupted upload to roll back.")
 
     fs, src_fd, dst_fd = get_versioned_fd_data(v_folder.dbdv_name)
 
     matches = upload_dbdv_matches(
+        db,
         fs,
         src_fd,
         dst_fd,
@@ -150,16 +214,14 @@ def update_match(
     del new_info["dbdv"]
     new_info["dbdv_id"] = (
         None if match_create.dbdv is None
-        else getr(
-            f"{EP.DBD_VERSION}/id",
-            params={"dbdv_str": str(match_create.dbdv)},
-        )
+        else dbdv_str_to_id(db, str(match_create.dbdv))
     )
 
     new_info["date_modified"] = datetime.now()
 
     select_query.update(new_info, synchronize_session=False)
     db.commit()
+    bump_version(TN.MATCHES)
 
     return Response(status_code=status.HTTP_200_OK)
 
@@ -4,26 +4,25 @@ from typing import TYPE_CHECKING
 
 from dbdie_classes.schemas.predictables import OfferingCreate, OfferingOut
 from dbdie_classes.schemas.types import OfferingTypeOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
     delete_one,
     do_count,
-    filter_one,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
     get_types,
-    getr,
+    search_async,
 )
-from backbone.exceptions import ValidationException
 from backbone.models.predictables import Character, Offering, OfferingType
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.services import insert_offering
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -40,14 +39,17 @@ def count_offerings(
 
 
 @router.get("", response_model=list[OfferingOut])
-def get_offerings(
+async def get_offerings(
     limit: int = 10,
     skip: int = 0,
     ifk: bool | None = None,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
     """Get many DBD offerings."""
-    return get_many(db, limit, Offering, skip, ifk, Character)
+    return fast_response(
+        OfferingOut,
+        await get_many_cached(adb, limit, Offering, skip, ifk, Character),
+    )
 
 
 @router.get("/types", response_model=list[OfferingTypeOut])
@@ -55,32 +57,65 @@ def get_offering_types(db: "Session" = Depends(get_db)):
     return get_types(db, OfferingType)
 
 
+@router.get("/icons/atlas")
+def get_offering_icons_atlas(request: Request):
+    """Get all the DBD offering icons packed in a single image."""
+    return get_atlas_image("offerings", request)
+
+
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_offering_icons_atlas_index():
+    """Get the position of each DBD offering icon in the icons atlas."""
+    return get_atlas_index("offerings")
+
+
+@router.get("/search", response_model=list[OfferingOut])
+async def search_offerings(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Fuzzy search DBD offerings by name, ranked by similarity."""
+    return await search_async(adb, Offering, q, limit)
+
+
+@router.get("/bulk", response_model=BulkOut[OfferingOut])
+async def get_offerings_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Get many DBD offerings by their IDs, in the same order."""
+    return await fetch_many_cached(adb, Offering, ids, Character)
+
+
+@router.post("/bulk", response_model=BulkOut[OfferingOut])
+async def post_offerings_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Same as the GET version, but with the IDs in the body."""
+    return await fetch_many_cached(adb, Offering, ids, Character)
+
+
 @router.get("/{id}", response_model=OfferingOut)
-def get_offering(id: int, db: "Session" = Depends(get_db)):
+async def get_offering(id: int, adb: "AsyncSession" = Depends(get_async_db)):
     """Get a DBD offering with a certain ID."""
-    return filter_one(db, Offering, id)[0]
+    return fast_response(
+        OfferingOut,
+        await fetch_one_cached(adb, Offering, id, mt_type=Character),
+    )
 
 
 @router.get("/{id}/icon")
-def get_offering_icon(id: int):
+def get_offering_icon(id: int, request: Request):
     """Get a DBD offering icon."""
-    return get_icon("offerings", id)
+    return get_icon("offerings", id, request=request)
 
 
 @router.post("", response_model=OfferingOut, status_code=status.HTTP_201_CREATED)
 def create_offering(offering: OfferingCreate, db: "Session" = Depends(get_db)):
     """Create a DBD offering."""
-    if NOT_WS_PATT.search(offering.name) is None:
-        raise ValidationException("Offering name can't be empty")
-
-    # TODO: assert type_id and user_id exists
-
-    new_offering = {"id": getr(f"{EP.OFFERING}/count")} | offering.model_dump()
-    new_offering = Offering(**new_offering)
-
-    add_commit_refresh(db, new_offering)
-
-    return get_req(EP.OFFERING, new_offering.id)
+    return insert_offering(db, offering)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
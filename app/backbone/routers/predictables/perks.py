@@ -3,28 +3,30 @@
 from typing import TYPE_CHECKING
 
 from dbdie_classes.schemas.predictables import PerkCreate, PerkOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from sqlalchemy import or_
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
     delete_one,
     do_count,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
-    getr,
-    update_one,
+    search_async,
     update_many,
+    update_one,
 )
-from backbone.exceptions import ItemNotFoundException, ValidationException
+from backbone.exceptions import ItemNotFoundException
 from backbone.models.groupings import Labels
 from backbone.models.predictables import Character, Perk
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.sequences import sync_sequence
+from backbone.services import fetch_perk, insert_perk
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -41,57 +43,78 @@ def count_perks(
 
 
 @router.get("", response_model=list[PerkOut])
-def get_perks(
+async def get_perks(
     limit: int = 10,
     skip: int = 0,
     ifk: bool | None = None,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
     """Get many DBD perks."""
-    return get_many(db, limit, Perk, skip, ifk, Character)
+    return fast_response(
+        PerkOut,
+        await get_many_cached(adb, limit, Perk, skip, ifk, Character),
+    )
+
+
+@router.get("/icons/atlas")
+def get_perk_icons_atlas(request: Request):
+    """Get all the DBD perk icons packed in a single image."""
+    return get_atlas_image("perks", request)
+
+
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_perk_icons_atlas_index():
+    """Get the position of each DBD perk icon in the icons atlas."""
+    return get_atlas_index("perks")
+
+
+@router.get("/search", response_model=list[PerkOut])
+async def search_perks(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Fuzzy search DBD perks by name, ranked by similarity."""
+    return await search_async(adb, Perk, q, limit, Character)
+
+
+@router.get("/bulk", response_model=BulkOut[PerkOut])
+async def get_perks_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Get many DBD perks by their IDs, in the same order."""
+    return await fetch_many_cached(adb, Perk, ids, Character)
+
+
+@router.post("/bulk", response_model=BulkOut[PerkOut])
+async def post_perks_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    """Same as the GET version, but with the IDs in the body."""
+    return await fetch_many_cached(adb, Perk, ids, Character)
 
 
 @router.get("/{id}", response_model=PerkOut)
-def get_perk(id: int, db: "Session" = Depends(get_db)):
+async def get_perk(id: int, adb: "AsyncSession" = Depends(get_async_db)):
     """Get a specific DBD perk with an ID."""
-    perk = (
-        db.query(
-            Perk.id,
-            Perk.name,
-            Perk.character_id,
-            Perk.dbdv_id,
-            Perk.emoji,
-            Character.ifk,
-        )
-        .join(Character)
-        .filter(Perk.id == id)
-        .first()
+    return fast_response(
+        PerkOut,
+        await fetch_one_cached(adb, Perk, id, "Perk", Character),
     )
-    if perk is None:
-        raise ItemNotFoundException("Perk", id)
-    return perk
 
 
 @router.get("/{id}/icon")
-def get_perk_icon(id: int):
+def get_perk_icon(id: int, request: Request):
     """Get a DBD perk icon."""
-    return get_icon("perks", id)
+    return get_icon("perks", id, request=request)
 
 
 @router.post("", response_model=PerkOut, status_code=status.HTTP_201_CREATED)
 def create_perk(perk: PerkCreate, db: "Session" = Depends(get_db)):
     """Create a DBD perk."""
-    if NOT_WS_PATT.search(perk.name) is None:
-        raise ValidationException("Perk name can't be empty")
-
-    getr(f"{EP.CHARACTER}/{perk.character_id}")
-
-    new_perk = {"id": getr(f"{EP.PERKS}/count")} | perk.model_dump()
-    new_perk = Perk(**new_perk)
-
-    add_commit_refresh(db, new_perk)
-
-    return get_req(EP.PERKS, new_perk.id)
+    return insert_perk(db, perk)
 
 
 @router.put("/{id}/change_id", response_model=PerkOut)
@@ -101,18 +124,20 @@ def change_perk_id(
     db: "Session" = Depends(get_db),
 ):
     assert new_id >= 0, "The new ID cannot be negative."
-    perk = getr(f"{EP.PERKS}/{id}")
+    perk = fetch_perk(db, id)
 
     # Check that the new perk id isn't taken
     try:
-        getr(f"{EP.PERKS}/{new_id}")
-    except Exception:
+        fetch_perk(db, new_id)
+    except ItemNotFoundException:
         pass
     else:
         raise AssertionError(f"New id '{new_id}' already exists.")
 
-    resp = update_one(db, perk, Perk, "Perk", id, new_id=new_id)
+    perk_create = PerkCreate(**{k: getattr(perk, k) for k in PerkCreate.model_fields})
+    resp = update_one(db, perk_create, Perk, "Perk", id, new_id=new_id)
     assert resp.status_code == status.HTTP_200_OK
+    sync_sequence(db, Perk)
 
     def update_cols(record) -> None:
         for col_name in ["perks_0", "perks_1", "perks_2", "perks_3"]:
@@ -134,8 +159,7 @@ def change_perk_id(
     # TODO: Deprecate perk models and extractors that use them
     # ...
 
-    perk.id = new_id
-    return perk
+    return fetch_perk(db, new_id)
 
 
 @router.put("/{id}", status_code=status.HTTP_200_OK)
@@ -1,10 +1,17 @@
 """Router code for player"""
 
-from backbone.endpoints import get_req
+from typing import TYPE_CHECKING
+
 from dbdie_classes.schemas.groupings import PlayerIn, PlayerOut
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from backbone.database import get_db
+from backbone.models.predictables import Addon, Character, Item, Offering
+from backbone.services import fetch_one, fetch_perk
+from backbone.sqla import object_as_dict
 
-from backbone.options import ENDPOINTS as EP
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter()
 
@@ -13,14 +20,18 @@ router = APIRouter()
 def form_player(
     id: int,
     player: PlayerIn,
+    db: "Session" = Depends(get_db),
 ):
+    def get_dict(model, item_id: int) -> dict:
+        return object_as_dict(fetch_one(db, model, item_id))
+
     player_out = PlayerOut(
         id=id,
-        character=get_req(EP.CHARACTER, player.character_id),
-        perks=[get_req(EP.PERKS, perk_id) for perk_id in player.perk_ids],
-        item=get_req(EP.ITEM, player.item_id),
-        addons=[get_req(EP.ADDONS, addon_id) for addon_id in player.addon_ids],
-        offering=get_req(EP.OFFERING, player.offering_id),
+        character=get_dict(Character, player.character_id),
+        perks=[fetch_perk(db, perk_id)._asdict() for perk_id in player.perk_ids],
+        item=get_dict(Item, player.item_id),
+        addons=[get_dict(Addon, addon_id) for addon_id in player.addon_ids],
+        offering=get_dict(Offering, player.offering_id),
     )
     player_out.check_consistency()
     return player_out
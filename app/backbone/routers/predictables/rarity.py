@@ -1,19 +1,21 @@
 """Router for item ratity."""
 
 from dbdie_classes.schemas.types import RarityOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from typing import TYPE_CHECKING
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
     delete_one,
     do_count,
-    filter_one,
-    get_many,
+    fast_response,
 )
 from backbone.models.types import Rarity
+from backbone.schemas import BulkOut
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -29,17 +31,33 @@ def count_items(
 
 
 @router.get("", response_model=list[RarityOut])
-def get_items(
+async def get_items(
     limit: int = 10,
     skip: int = 0,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return fast_response(RarityOut, await get_many_cached(adb, limit, Rarity, skip))
+
+
+@router.get("/bulk", response_model=BulkOut[RarityOut])
+async def get_rarities_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Rarity, ids)
+
+
+@router.post("/bulk", response_model=BulkOut[RarityOut])
+async def post_rarities_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    return get_many(db, limit, Rarity, skip)
+    return await fetch_many_cached(adb, Rarity, ids)
 
 
 @router.get("/{id}", response_model=RarityOut)
-def get_item(id: int, db: "Session" = Depends(get_db)):
-    return filter_one(db, Rarity, id)[0]
+async def get_item(id: int, adb: "AsyncSession" = Depends(get_async_db)):
+    return fast_response(RarityOut, await fetch_one_cached(adb, Rarity, id))
 
 
 # TODO: Create rarity
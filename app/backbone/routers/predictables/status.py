@@ -2,27 +2,25 @@
 
 from typing import TYPE_CHECKING
 
-import requests
 from dbdie_classes.schemas.predictables import StatusCreate, StatusOut
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
-from backbone.database import get_db
+from backbone.cache import fetch_many_cached, fetch_one_cached, get_many_cached
+from backbone.code.icons import get_atlas_image, get_atlas_index
+from backbone.database import get_async_db, get_db
 from backbone.endpoints import (
-    NOT_WS_PATT,
-    add_commit_refresh,
     delete_one,
     do_count,
-    endp,
+    fast_response,
     get_icon,
-    get_many,
-    get_req,
-    getr,
+    search_async,
 )
-from backbone.exceptions import ItemNotFoundException, ValidationException
 from backbone.models.predictables import Character, Status
-from backbone.options import ENDPOINTS as EP
+from backbone.schemas import BulkOut, IconAtlasIndex
+from backbone.services import insert_status
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
     from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -34,56 +32,69 @@ def count_statuses(text: str = "", db: "Session" = Depends(get_db)):
 
 
 @router.get("", response_model=list[StatusOut])
-def get_statuses(
+async def get_statuses(
     limit: int = 10,
     skip: int = 0,
     ifk: bool | None = None,
-    db: "Session" = Depends(get_db),
+    adb: "AsyncSession" = Depends(get_async_db),
 ):
-    return get_many(db, limit, Status, skip, ifk, Character)
+    return fast_response(
+        StatusOut,
+        await get_many_cached(adb, limit, Status, skip, ifk, Character),
+    )
+
+
+@router.get("/icons/atlas")
+def get_status_icons_atlas(request: Request):
+    return get_atlas_image("statuses", request)
+
+
+@router.get("/icons/atlas/index", response_model=IconAtlasIndex)
+def get_status_icons_atlas_index():
+    return get_atlas_index("statuses")
+
+
+@router.get("/search", response_model=list[StatusOut])
+async def search_statuses(
+    q: str,
+    limit: int = 10,
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await search_async(adb, Status, q, limit, Character)
+
+
+@router.get("/bulk", response_model=BulkOut[StatusOut])
+async def get_statuses_bulk(
+    ids: list[int] = Query(),
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Status, ids, Character)
+
+
+@router.post("/bulk", response_model=BulkOut[StatusOut])
+async def post_statuses_bulk(
+    ids: list[int],
+    adb: "AsyncSession" = Depends(get_async_db),
+):
+    return await fetch_many_cached(adb, Status, ids, Character)
 
 
 @router.get("/{id}", response_model=StatusOut)
-def get_status(id: int, db: "Session" = Depends(get_db)):
-    # TODO: Replace with base function
-    status_ = (
-        db.query(
-            Status.id,
-            Status.name,
-            Status.character_id,
-            Status.is_dead,
-            Status.dbdv_id,
-            Status.emoji,
-            Character.ifk,
-        )
-        .join(Character)
-        .filter(Status.id == id)
-        .first()
+async def get_status(id: int, adb: "AsyncSession" = Depends(get_async_db)):
+    return fast_response(
+        StatusOut,
+        await fetch_one_cached(adb, Status, id, "Status", Character),
     )
-    if status_ is None:
-        raise ItemNotFoundException("Status", id)
-    return status_
 
 
 @router.get("/{id}/icon")
-def get_status_icon(id: int):
-    return get_icon("statuses", id, plural_len=2)
+def get_status_icon(id: int, request: Request):
+    return get_icon("statuses", id, plural_len=2, request=request)
 
 
 @router.post("", response_model=StatusOut, status_code=status.HTTP_201_CREATED)
 def create_status(status: StatusCreate, db: "Session" = Depends(get_db)):
-    if NOT_WS_PATT.search(status.name) is None:
-        raise ValidationException("Status name can't be empty")
-
-    resp = requests.get(endp(f"{EP.CHARACTER}/{status.character_id}"))
-    assert resp.status_code == 200
-
-    new_status = {"id": getr(f"{EP.STATUS}/count")} | status.model_dump()
-    new_status = Status(**new_status)
-
-    add_commit_refresh(db, new_status)
-
-    return get_req(EP.STATUS, new_status.id)
+    return insert_status(db, status)
 
 
 @router.delete("/{id}", status_code=status.HTTP_200_OK)
@@ -1,25 +1,41 @@
 """Endpoint for backup related processes."""
 
-from fastapi import APIRouter, status
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, status
 from backbone.code.backup import (
     backup_crops,
     backup_images,
     backup_labels,
     get_new_version_id,
 )
+from backbone.database import get_db
+from backbone.jobs import raise_if_cancelled, register_job, submit_job
+from backbone.schemas import JobOut
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
+@register_job("backup")
+def run_backup_data(db: "Session"):
+    version_id = get_new_version_id()
+    backup_crops(version_id)
+    raise_if_cancelled()
+    backup_images(version_id)
+    raise_if_cancelled()
+    backup_labels(version_id)
+
+
 @router.post(
     "/backup",
-    status_code=status.HTTP_201_CREATED,
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
 )
-def backup_data():
-    """Backup processed data.
+def backup_data(db: "Session" = Depends(get_db)):
+    """Backup processed data, as a background job.
     Useful for when DBD releases a new endcard style.
     """
-    version_id = get_new_version_id()
-    backup_crops(version_id)
-    backup_images(version_id)
-    backup_labels(version_id)
+    return submit_job(db, "backup", {})
@@ -1,23 +1,54 @@
 """Endpoint for cropping related purposes."""
 
-from fastapi import APIRouter, status
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, status
 
 from dbdie_classes.base import FullModelType
 
+from backbone.database import get_db
 from backbone.endpoints import postr
+from backbone.jobs import register_job, submit_job
 from backbone.options import ML_ENDPOINTS as MLEP
+from backbone.schemas import JobOut
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.post("/batch", status_code=status.HTTP_201_CREATED)
+@register_job("crop", interruptible=False)
+def run_batch_crop(
+    db: "Session",
+    cropper_swarm_name: str,
+    move: bool,
+    use_croppers: list[str] | None,
+    use_fmts: list[FullModelType] | None,
+):
+    return postr(
+        f"{MLEP.CROP}/batch",
+        ml=True,
+        params={
+            "cropper_swarm_name": cropper_swarm_name,
+            "move": move,
+        },
+        json={
+            "use_croppers": use_croppers,
+            "use_fmts": use_fmts,
+        },
+    )
+
+
+@router.post("/batch", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
 def batch_crop(
     cropper_swarm_name: str,
     move: bool = True,
     use_croppers: list[str] | None = None,
     use_fmts: list[FullModelType] | None = None,
+    db: "Session" = Depends(get_db),
 ):
-    """[NEW] Run all Croppers iterating on images first.
+    """[NEW] Run all Croppers iterating on images first, as a background job.
 
     move: Whether to move the source images at the end of the cropping.
         Note: The MovableReport still avoids creating crops
@@ -27,14 +58,12 @@ def batch_crop(
     - use_croppers: Filter cropping using Cropper names (level=Cropper).
     - use_fmt: Filter cropping using FullModelTypes names (level=crop type).
     """
-    return postr(
-        f"{MLEP.CROP}/batch",
-        ml=True,
-        params={
+    return submit_job(
+        db,
+        "crop",
+        {
             "cropper_swarm_name": cropper_swarm_name,
             "move": move,
-        },
-        json={
             "use_croppers": use_croppers,
             "use_fmts": use_fmts,
         },
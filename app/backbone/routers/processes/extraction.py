@@ -1,48 +1,93 @@
 """Endpoint for extraction related processes."""
 
-from fastapi import APIRouter, status
-import requests
+from typing import TYPE_CHECKING
 
-from backbone.code.extract import get_extr_id, get_zip
-from backbone.endpoints import endp, postr
-from backbone.options import ENDPOINTS as EP
+from fastapi import APIRouter, Depends, status
+
+from backbone.code.extract import apply_streamed_preds, get_extr_id, get_zip
+from backbone.code.labels import bulk_update_labels_strict
+from backbone.database import get_db
+from backbone.endpoints import postr, postr_stream
+from backbone.exceptions import ValidationException
+from backbone.jobs import raise_if_cancelled, register_job, submit_job
 from backbone.options import ML_ENDPOINTS as MLEP
+from backbone.schemas import JobOut
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.post("", status_code=status.HTTP_201_CREATED)
+@register_job("extract")
+def run_batch_extract(
+    db: "Session",
+    extr_id: int,
+    extr_name: str,
+    use_dbdvr: bool,
+    batch_size: int | None,
+    stream: bool,
+):
+    params = {
+        "extr_name": extr_name,
+        "use_dbdvr": use_dbdvr,
+        # "fmts": fmts,
+    }
+
+    if stream:
+        resp = postr_stream(
+            f"{MLEP.EXTRACT}/batch/stream",
+            ml=True,
+            params=params,
+            headers={"Accept": "application/x-ndjson"},
+        )
+        return apply_streamed_preds(db, resp, extr_id, chunk_size=batch_size)
+
+    resp = postr(f"{MLEP.EXTRACT}/batch", ml=True, params=params)
+    reports = []
+    for fmt, d in resp.items():
+        raise_if_cancelled()
+        reports.append(
+            bulk_update_labels_strict(
+                db,
+                fmt,
+                get_zip(d),
+                user_id=1,  # TODO
+                extr_id=extr_id,
+                batch_size=batch_size,
+            )
+        )
+    return reports
+
+
+@router.post("", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
 def batch_extract(
     extr_name: str,
     use_dbdvr: bool = True,
+    batch_size: int | None = 10_000,
+    stream: bool = False,
     # fmts: list[FullModelType] | None = None,  # TODO
+    db: "Session" = Depends(get_db),
 ):
-    """IMPORTANT. If doing partial uploads, please use 'fmts'."""
-    extr_id = get_extr_id(extr_name)
-    resp = postr(
-        f"{MLEP.EXTRACT}/batch",
-        ml=True,
-        params={
+    """IMPORTANT. If doing partial uploads, please use 'fmts'.
+    The extraction runs as a background job, whose result is the list of labels reports.
+
+    batch_size: Max amount of labels rows updated (and committed) at once.
+        If None, each full model type is written in a single transaction
+        (not allowed when streaming).
+    stream: Consume the ML extraction as NDJSON records, writing the labels
+        in chunks of `batch_size` as they arrive instead of waiting for all of them.
+    """
+    if stream and batch_size is None:
+        raise ValidationException("Streamed extraction needs a batch size.")
+    return submit_job(
+        db,
+        "extract",
+        {
+            "extr_id": get_extr_id(db, extr_name),
             "extr_name": extr_name,
             "use_dbdvr": use_dbdvr,
-            # "fmts": fmts,
+            "batch_size": batch_size,
+            "stream": stream,
         },
     )
-
-    put_endp = endp(f"{EP.LABELS}/predictable/strict")
-    for fmt, d in resp.items():
-        zipped = get_zip(d)
-        for mid, pid, iid, pred in zipped:
-            resp = requests.put(
-                put_endp,
-                params={
-                    "match_id": mid,
-                    "player_id": pid,
-                    "item_id": iid,
-                    "fmt": fmt,
-                    "value": pred,
-                    "user_id": 1,  # TODO
-                    "extr_id": extr_id,
-                },
-            )
-            assert resp.status_code == status.HTTP_200_OK
@@ -0,0 +1,62 @@
+"""Endpoint for the background jobs of the processes."""
+
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+
+from backbone.database import get_db
+from backbone.jobs import SUCCEEDED, cancel_job
+from backbone.models.objects import Job
+from backbone.schemas import JobOut
+from backbone.services import fetch_one
+from backbone.sqla import limit_and_skip
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[JobOut])
+def get_jobs(
+    limit: int = 10,
+    skip: int = 0,
+    job_status: str | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """Get many jobs, the most recent first."""
+    stmt = select(Job).order_by(Job.id.desc())
+    if job_status is not None:
+        stmt = stmt.where(Job.status == job_status)
+    return db.scalars(limit_and_skip(stmt, limit, skip)).all()
+
+
+@router.get("/{id}", response_model=JobOut)
+def get_job(id: int, db: "Session" = Depends(get_db)):
+    """Get the status of a job."""
+    return fetch_one(db, Job, id, "Job")
+
+
+@router.get("/{id}/result", response_model=Any)
+def get_job_result(id: int, db: "Session" = Depends(get_db)):
+    """Get the result of a job, once it succeeded."""
+    job = fetch_one(db, Job, id, "Job")
+    if job.status != SUCCEEDED:
+        raise HTTPException(
+            status.HTTP_409_CONFLICT,
+            f"Job {id} has no result, since it's {job.status}.",
+        )
+    return job.result
+
+
+@router.post(
+    "/{id}/cancel",
+    response_model=JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def cancel(id: int, db: "Session" = Depends(get_db)):
+    """Cancel a job. A running job stops at its next step, so its status
+    turns to 'cancelled' afterwards, unless its kind can't be interrupted (409).
+    """
+    return cancel_job(db, fetch_one(db, Job, id, "Job"))
@@ -1,8 +1,10 @@
 """Endpoint for training related processes."""
 
 from copy import deepcopy
+from typing import TYPE_CHECKING
+
 from dbdie_classes.base import FullModelType
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
 
 from backbone.code.training import (
     extr_existance,
@@ -15,35 +17,44 @@ from backbone.code.training import (
     update_extractor,
     update_models,
 )
-from backbone.endpoints import EP, getr
+from backbone.database import get_db
+from backbone.exceptions import ValidationException
+from backbone.jobs import raise_if_cancelled, register_job, submit_job
+from backbone.models.objects import CropperSwarm
+from backbone.schemas import JobOut
+from backbone.services import fetch_one
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.post("", status_code=status.HTTP_201_CREATED)
-def batch_train(
-    extr_id: int | None = None,
-    extr_name: str | None = None,
-    cps_id: int | None = None,
-    stratify_fallback: bool = False,
-    fmts: list[FullModelType] | None = None,
+@register_job("train")
+def run_batch_train(
+    db: "Session",
+    extr_id: int | None,
+    extr_name: str | None,
+    cps_id: int | None,
+    stratify_fallback: bool,
+    fmts: list[FullModelType] | None,
 ):
-    """IMPORTANT. If doing partial training, please use 'fmts'."""
     extr_exists = extr_existance(extr_id, extr_name, cps_id)
-    extr_id_ = get_extr_id(extr_id, extr_exists)
+    extr_id_ = get_extr_id(db, extr_id, extr_exists)
 
     if extr_exists:
-        assert fmts is None, "You can't choose fmts when retraining."
-        extr_info, models_info, ptups = goi_existing(extr_id_)
+        extr_info, models_info, ptups = goi_existing(db, extr_id_)
     else:
         extr_name_ = (
             deepcopy(extr_name) if extr_name is not None else "test-2"
         )  # TODO: add optional randomized
-        extr_info, models_info, ptups = goi_not_existing(extr_id_, extr_name_, fmts, cps_id)
+        extr_info, models_info, ptups = goi_not_existing(db, extr_id_, extr_name_, fmts, cps_id)
 
-    fmts_with_counts = get_fmts_with_counts(ptups)
-    cps_name = getr(f"{EP.CROPPER_SWARM}/{extr_info['cps_id']}")["name"]
+    raise_if_cancelled()
+    fmts_with_counts = get_fmts_with_counts(db, ptups)
+    cps_name = fetch_one(db, CropperSwarm, extr_info["cps_id"]).name
 
+    raise_if_cancelled()
     extr_out, models_out = train_extractor(
         extr_info["id"],
         extr_info["name"],
@@ -52,6 +63,7 @@ def batch_train(
         fmts_with_counts=fmts_with_counts,
         stratify_fallback=stratify_fallback,
     )
+    raise_if_cancelled()
     extr_out, models_out = patch_objects_info(
         extr_out,
         extr_info,
@@ -62,3 +74,30 @@ def batch_train(
 
     update_models(extr_exists, extr_out["models_ids"], models_out)
     update_extractor(extr_exists, extr_out, extr_id_)
+
+
+@router.post("", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def batch_train(
+    extr_id: int | None = None,
+    extr_name: str | None = None,
+    cps_id: int | None = None,
+    stratify_fallback: bool = False,
+    fmts: list[FullModelType] | None = None,
+    db: "Session" = Depends(get_db),
+):
+    """IMPORTANT. If doing partial training, please use 'fmts'.
+    The training runs as a background job.
+    """
+    if extr_existance(extr_id, extr_name, cps_id) and fmts is not None:
+        raise ValidationException("You can't choose fmts when retraining.")
+    return submit_job(
+        db,
+        "train",
+        {
+            "extr_id": extr_id,
+            "extr_name": extr_name,
+            "cps_id": cps_id,
+            "stratify_fallback": stratify_fallback,
+            "fmts": fmts,
+        },
+    )
@@ -0,0 +1,81 @@
+"""API-specific pydantic schemas that don't belong in the shared classes package."""
+
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class LabelsPredictions(BaseModel):
+    """Predictions of a single full model type, as returned by the ML API."""
+
+    match_ids: list[int]
+    player_ids: list[int]
+    item_ids: list[int] | None = None
+    preds: list[int]
+
+
+class FilenameIdsOut(BaseModel):
+    """Match ids of a list of filenames, and the filenames that weren't found."""
+
+    ids: dict[str, int]
+    missing: list[str]
+
+
+class EmptyLabelsReport(BaseModel):
+    """Report of the initialization of empty labels for the cropped matches."""
+
+    files: int
+    matches: int
+    unregistered_files: int
+    labels_created: int
+
+
+class LabelsBulkReport(BaseModel):
+    """Report of a bulk labels write."""
+
+    fmt: str
+    rows: int
+    updated: int
+    batches: int
+
+
+class BulkOut(BaseModel, Generic[T]):
+    """Items requested by their ids (in the same order), and the ids that weren't found."""
+
+    items: list[T]
+    missing: list[int]
+
+
+class IconRect(BaseModel):
+    """Position of an icon inside an icons atlas."""
+
+    x: int
+    y: int
+    w: int
+    h: int
+
+
+class IconAtlasIndex(BaseModel):
+    """Position of each icon (by id) inside the icons atlas of a predictable type."""
+
+    fingerprint: str
+    width: int
+    height: int
+    icons: dict[int, IconRect]
+
+
+class JobOut(BaseModel):
+    """Status of a background job. Its result is served on its own."""
+
+    id: int
+    kind: str
+    status: str
+    params: dict
+    error: str | None
+    cancel_requested: bool
+    date_created: datetime
+    date_started: datetime | None
+    date_finished: datetime | None
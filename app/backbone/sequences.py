@@ -0,0 +1,89 @@
+"""ID allocation backed by Postgres sequences (one per table, created lazily)."""
+
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from backbone.options import TABLE_NAMES as TN
+
+if TYPE_CHECKING:
+    from dbdie_classes.base import TableName
+    from sqlalchemy.orm import Session
+
+ID_STARTS: dict["TableName", int] = {TN.DBD_VERSION: 1}
+"""First id of each table. Tables not listed here start at 0."""
+
+_ensured: set["TableName"] = set()
+_ensured_lock = Lock()
+
+
+def seq_name(tname: "TableName") -> str:
+    return f"dbdie_{tname}_id_seq"
+
+
+def ensure_sequence(db: "Session", model) -> str:
+    """Create the id sequence of the model's table if needed, and return its name.
+    A sequence that hasn't handed out any id yet is synced with the table's max id.
+    It runs in its own transaction, so it doesn't commit the session's pending work.
+    """
+    tname = model.__tablename__
+    seq = seq_name(tname)
+    if tname in _ensured:
+        return seq
+
+    with _ensured_lock, db.get_bind().begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:seq))"), {"seq": seq})
+        conn.execute(
+            text(f'CREATE SEQUENCE IF NOT EXISTS "{seq}" MINVALUE 0 OWNED BY "{tname}".id')
+        )
+        conn.execute(
+            text(
+                f'SELECT setval(\'"{seq}"\', '
+                + f'(SELECT coalesce(max(id) + 1, :start) FROM "{tname}"), false) '
+                + f'WHERE NOT (SELECT is_called FROM "{seq}")'
+            ),
+            {"start": ID_STARTS.get(tname, 0)},
+        )
+        _ensured.add(tname)
+
+    return seq
+
+
+def allocate_ids(db: "Session", model, n: int = 1) -> list[int]:
+    """Reserve a block of `n` ids for the model's table.
+    The ids are unique but not necessarily contiguous.
+    """
+    assert n > 0
+    seq = ensure_sequence(db, model)
+    return (
+        db.execute(
+            text(f"SELECT nextval('\"{seq}\"') FROM generate_series(1, :n)"),
+            {"n": n},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def next_id(db: "Session", model) -> int:
+    """Reserve the next id of the model's table."""
+    return allocate_ids(db, model, 1)[0]
+
+
+def sync_sequence(db: "Session", model) -> None:
+    """Make sure the sequence won't hand out ids already in use, for when
+    ids are set manually (e.g. when changing an item's id).
+    """
+    seq = ensure_sequence(db, model)
+    tname = model.__tablename__
+    # The next value is 'last_value' itself until the sequence hands out its first id
+    db.execute(
+        text(
+            f'SELECT setval(\'"{seq}"\', greatest('
+            + f'(SELECT max(id) + 1 FROM "{tname}"), '
+            + "(SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END "
+            + f'FROM "{seq}")'
+            + "), false)"
+        )
+    )
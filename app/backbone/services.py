@@ -0,0 +1,208 @@
+"""Service layer: plain functions that routers call in-process with their current
+session, instead of requesting our own API over HTTP.
+"""
+
+from traceback import print_exc
+from typing import TYPE_CHECKING
+
+from dbdie_classes.schemas.groupings import LabelsOut, MatchOut
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from sqlalchemy import select
+
+from backbone.cache import bump_version
+from backbone.code.labels import filter_one_labels_row
+from backbone.endpoints import (
+    NOT_WS_PATT,
+    add_commit_refresh,
+    filter_one,
+)
+from backbone.exceptions import ItemNotFoundException, ValidationException
+from backbone.models.groupings import Match
+from backbone.models.helpers import DBDVersion
+from backbone.models.predictables import (
+    Addon,
+    Character,
+    Item,
+    Offering,
+    Perk,
+    Status,
+)
+from backbone.options import TABLE_NAMES as TN
+from backbone.sequences import next_id
+from backbone.sqla import object_as_dict
+
+if TYPE_CHECKING:
+    from dbdie_classes.schemas.helpers import DBDVersionCreate
+    from dbdie_classes.schemas.predictables import (
+        AddonCreate,
+        CharacterCreate,
+        ItemCreate,
+        OfferingCreate,
+        PerkCreate,
+        StatusCreate,
+    )
+    from sqlalchemy import Select
+    from sqlalchemy.orm import Session
+
+
+def check_name(name: str, model_str: str, name_col: str = "name") -> None:
+    """Assert that a name-like value isn't empty nor only whitespace."""
+    if NOT_WS_PATT.search(name) is None:
+        raise ValidationException(f"{model_str} {name_col} can't be empty")
+
+
+# * Get by id
+
+
+def fetch_one(
+    db: "Session",
+    model,
+    id: int,
+    model_str: str | None = None,
+):
+    """Get an item by its id."""
+    return filter_one(db, model, id, model_str)[0]
+
+
+def perk_select(id: int) -> "Select":
+    """Select a perk by its id, along with its character's ifk."""
+    return (
+        select(
+            Perk.id,
+            Perk.name,
+            Perk.character_id,
+            Perk.dbdv_id,
+            Perk.emoji,
+            Character.ifk,
+        )
+        .join(Character)
+        .where(Perk.id == id)
+    )
+
+
+def status_select(id: int) -> "Select":
+    """Select a status by its id, along with its character's ifk."""
+    return (
+        select(
+            Status.id,
+            Status.name,
+            Status.character_id,
+            Status.is_dead,
+            Status.dbdv_id,
+            Status.emoji,
+            Character.ifk,
+        )
+        .join(Character)
+        .where(Status.id == id)
+    )
+
+
+def fetch_perk(db: "Session", id: int):
+    """Get a perk by its id, along with its character's ifk."""
+    perk = db.execute(perk_select(id)).first()
+    if perk is None:
+        raise ItemNotFoundException("Perk", id)
+    return perk
+
+
+def fetch_status(db: "Session", id: int):
+    """Get a status by its id, along with its character's ifk."""
+    status_ = db.execute(status_select(id)).first()
+    if status_ is None:
+        raise ItemNotFoundException("Status", id)
+    return status_
+
+
+def fetch_match(db: "Session", id: int) -> MatchOut:
+    """Get a match by its id."""
+    m = fetch_one(db, Match, id, "Match")
+    return MatchOut(**object_as_dict(m))
+
+
+def fetch_labels(db: "Session", match_id: int, player_id: int) -> LabelsOut:
+    """Get player-centered labels by their (match_id, player_id)."""
+    labels, _ = filter_one_labels_row(db, match_id, player_id)
+    return LabelsOut.from_labels(labels)
+
+
+# * Create
+
+
+def insert_one(db: "Session", model, id: int, schema_create):
+    """Insert an item with a certain id, and get it back refreshed."""
+    new_item = model(**({"id": id} | schema_create.model_dump()))
+    add_commit_refresh(db, new_item)
+    return new_item
+
+
+def insert_character(db: "Session", character: "CharacterCreate"):
+    check_name(character.name, "Character")
+    new_character = insert_one(db, Character, next_id(db, Character), character)
+    return fetch_one(db, Character, new_character.id)
+
+
+def insert_perk(db: "Session", perk: "PerkCreate"):
+    check_name(perk.name, "Perk")
+    fetch_one(db, Character, perk.character_id)
+    new_perk = insert_one(db, Perk, next_id(db, Perk), perk)
+    return fetch_perk(db, new_perk.id)
+
+
+def insert_item(db: "Session", item: "ItemCreate"):
+    check_name(item.name, "Item")
+    # TODO: assert type_id exists
+    new_item = insert_one(db, Item, next_id(db, Item), item)
+    return fetch_one(db, Item, new_item.id)
+
+
+def insert_addon(db: "Session", addon: "AddonCreate"):
+    check_name(addon.name, "Addon")
+    fetch_one(db, Item, addon.item_id)
+    # TODO: assert type_id exists
+    new_addon = insert_one(db, Addon, next_id(db, Addon), addon)
+    return fetch_one(db, Addon, new_addon.id)
+
+
+def insert_offering(db: "Session", offering: "OfferingCreate"):
+    check_name(offering.name, "Offering")
+    # TODO: assert type_id and user_id exists
+    new_offering = insert_one(db, Offering, next_id(db, Offering), offering)
+    return fetch_one(db, Offering, new_offering.id)
+
+
+def insert_status(db: "Session", status_: "StatusCreate"):
+    check_name(status_.name, "Status")
+    fetch_one(db, Character, status_.character_id)
+    new_status = insert_one(db, Status, next_id(db, Status), status_)
+    return fetch_status(db, new_status.id)
+
+
+def insert_dbdv(db: "Session", dbdv: "DBDVersionCreate"):
+    check_name(dbdv.name, "DBD version")
+    new_dbdv = insert_one(db, DBDVersion, next_id(db, DBDVersion), dbdv)
+    return fetch_one(db, DBDVersion, new_dbdv.id, "DBD version")
+
+
+def insert_match(db: "Session", new_match: dict) -> MatchOut:
+    """Insert a match from a dict with the `Match` model's columns (without the id)."""
+    check_name(new_match["filename"], "Match", name_col="filename")
+
+    new_match = Match(**({"id": next_id(db, Match)} | new_match))
+    db.add(new_match)
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print_exc()
+        raise HTTPException(
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            (
+                "There was an error commiting the match. "
+                + "Make sure you are not reuploading an image with an existing filename."
+            ),
+        ) from e
+    bump_version(TN.MATCHES)
+    db.refresh(new_match)
+
+    return fetch_match(db, new_match.id)
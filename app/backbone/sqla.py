@@ -1,12 +1,18 @@
 """SQLAlchemy related functions."""
 
-from sqlalchemy import func, inspect, or_
+import base64
+import io
+import json
+from sqlalchemy import func, inspect, or_, select, text, tuple_
 from typing import TYPE_CHECKING
 
+from backbone.exceptions import ValidationException
 from backbone.options import TABLE_NAMES as TN
 
 if TYPE_CHECKING:
-    from sqlalchemy import Column
+    import pandas as pd
+    from dbdie_classes.base import TableName
+    from sqlalchemy import Column, Select
     from sqlalchemy.orm import Query, Session
 
 
@@ -34,6 +40,60 @@ def limit_and_skip(query: "Query", limit: int, skip: int) -> "Query":
     )
 
 
+def encode_cursor(*keys: int) -> str:
+    """Opaque cursor that points to the row with the primary key 'keys'."""
+    return base64.urlsafe_b64encode(json.dumps(keys).encode()).decode()
+
+
+def decode_cursor(cursor: str, n_keys: int) -> list[int]:
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        assert isinstance(keys, list) and len(keys) == n_keys
+        assert all(isinstance(k, int) for k in keys)
+    except Exception as e:
+        raise ValidationException("Invalid cursor") from e
+    return keys
+
+
+def seek_after(query: "Query", key_cols: list["Column"], after: str) -> "Query":
+    """Keyset pagination: keep the rows that come after the cursor, in key order.
+    An empty cursor starts from the first row.
+    """
+    if after != "":
+        keys = decode_cursor(after, len(key_cols))
+        query = query.filter(
+            key_cols[0] > keys[0] if len(key_cols) == 1
+            else tuple_(*key_cols) > tuple_(*keys)
+        )
+    return query.order_by(*key_cols)
+
+
+def paginate(
+    query: "Query",
+    limit: int,
+    skip: int,
+    after: str | None,
+    key_cols: list["Column"],
+) -> "Query":
+    """Paginate with the cursor 'after' if provided, else with LIMIT/OFFSET."""
+    if after is None:
+        return limit_and_skip(query, limit, skip)
+    if skip != 0:
+        raise ValidationException("'skip' and 'after' can't be used together")
+    return seek_after(query, key_cols, after).limit(limit)
+
+
+def lower_text_col(model):
+    """Lowercased name-column of the model, as indexed by the trigram indexes."""
+    tname = model.__tablename__
+    if tname in TN.NAME_FILTERED_TABLENAMES:
+        return func.lower(model.name)
+    elif tname == TN.MATCHES:
+        return func.lower(model.filename)
+    else:
+        raise NotImplementedError(f"Table '{tname}' has no name-column implemented.")
+
+
 def filter_with_text(query: "Query", model, search_text: str) -> "Query":
     """Add a filter to a sqlalchemy query based on the filtered column.
     search_text must already be non-empty.
@@ -41,37 +101,110 @@ def filter_with_text(query: "Query", model, search_text: str) -> "Query":
     if search_text == "":
         return query
 
+    return query.filter(lower_text_col(model).contains(search_text.lower()))
+
+
+def search_select(
+    model,
+    search_text: str,
+    limit: int,
+    mt_type=None,
+) -> "Select":
+    """Typo-tolerant search on the name-column of the model, ranked by similarity.
+    If 'mt_type' is provided, its ifk is added to the selected columns.
+
+    Matches either contain the text, or contain a word similar enough to it
+    (pg_trgm's `%>` operator). Both conditions are served by the trigram indexes.
+    """
+    assert limit > 0
+    col = lower_text_col(model)
     search_text = search_text.lower()
 
-    tname = model.__tablename__
-    if tname in TN.NAME_FILTERED_TABLENAMES:
-        return query.filter(func.lower(model.name).contains(search_text))
-    elif tname == TN.MATCHES:
-        return query.filter(func.lower(model.filename).contains(search_text))
-    else:
-        raise NotImplementedError(f"Table '{tname}' has no name-column implemented.")
+    stmt = select(*model.__table__.columns)
+    if mt_type is not None:
+        stmt = stmt.add_columns(mt_type.ifk).join(mt_type)
+    return (
+        stmt
+        .where(or_(col.contains(search_text), col.op("%>")(search_text)))
+        .order_by(
+            func.word_similarity(search_text, col).desc(),
+            func.similarity(col, search_text).desc(),
+            model.id,
+        )
+        .limit(limit)
+    )
 
 
-def get_items_query(
-    db: "Session",
+def filter_items(
+    query: "Query | Select",
     limit: int,
     model,
     skip: int,
     ifk: bool | None,
     mt_type,
     text: str,
-) -> "Query":
-    """Base get many function. 'model' is the sqlalchemy model."""
+    after: str | None = None,
+) -> "Query | Select":
+    """Apply the base get many filters to either a Query or a Select."""
     assert limit > 0
     assert skip >= 0
 
-    query = db.query(model)
     query = join_and_filter_ifk(query, model, mt_type, ifk)
     query = filter_with_text(query, model, text)
-    query = limit_and_skip(query, limit, skip)
+    query = paginate(query, limit, skip, after, [model.id])
     return query
 
 
+def get_items_query(
+    db: "Session",
+    limit: int,
+    model,
+    skip: int,
+    ifk: bool | None,
+    mt_type,
+    text: str,
+    after: str | None = None,
+) -> "Query":
+    """Base get many function. 'model' is the sqlalchemy model."""
+    return filter_items(db.query(model), limit, model, skip, ifk, mt_type, text, after)
+
+
+def get_items_select(
+    limit: int,
+    model,
+    skip: int,
+    ifk: bool | None,
+    mt_type,
+    text: str,
+    after: str | None = None,
+) -> "Select":
+    """Base get many statement, for use with an async session."""
+    return filter_items(select(model), limit, model, skip, ifk, mt_type, text, after)
+
+
+def count_select(
+    model,
+    ifk: bool | None,
+    mt_type,
+    text: str,
+) -> "Select":
+    """Direct `SELECT count(*)` with the base get many filters."""
+    stmt = select(func.count()).select_from(model)
+    stmt = join_and_filter_ifk(stmt, model, mt_type, ifk)
+    return filter_with_text(stmt, model, text)
+
+
+def estimate_count(db: "Session", tname: "TableName") -> int | None:
+    """Planner's estimate of the amount of rows of a table (as of its last ANALYZE),
+    or None if the table was never analyzed.
+    """
+    n = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tname)"),
+        {"tname": f'"{tname}"'},
+    ).scalar()
+    return n if (n is not None) and (n >= 0) else None
+
+
 def object_as_dict(obj) -> dict:
     """Convert a sqlalchemy object into a dict."""
     return {c.key: getattr(obj, c.key) for c in inspect(obj).mapper.column_attrs}
@@ -89,3 +222,29 @@ def fill_cols_custom(
     elif force_prepend_default_col:
         cols = default_cols + cols
     return cols
+
+
+def copy_to_staging(
+    db: "Session",
+    df: "pd.DataFrame",
+    tname: "TableName",
+    staging_tname: str,
+    chunk_rows: int = 50_000,
+) -> None:
+    """Stream a DataFrame with COPY into a temporary staging table shaped like `tname`.
+    The staging table lives in the session's transaction and is dropped on commit.
+    """
+    assert chunk_rows > 0
+
+    cursor = db.connection().connection.cursor()
+    cursor.execute(
+        f'CREATE TEMP TABLE "{staging_tname}" (LIKE "{tname}" INCLUDING DEFAULTS) ON COMMIT DROP'
+    )
+
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    copy_sql = f'COPY "{staging_tname}" ({cols}) FROM STDIN WITH (FORMAT csv)'
+    for start in range(0, df.shape[0], chunk_rows):
+        buffer = io.StringIO()
+        df.iloc[start : start + chunk_rows].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
@@ -1,10 +1,16 @@
 """Main FastAPI API."""
 
+from contextlib import asynccontextmanager
+
 from backbone.routers.predictables import character, item, offering, status
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 # from fastapi.middleware.cors import CORSMiddleware
 
+from backbone.database import async_engine, engine
+from backbone.jobs import start_jobs, stop_jobs
 from backbone.options import ENDPOINTS as EP
+from backbone.pool import pool_status
 from backbone.routers.helpers import dbd_version
 from backbone.routers.objects import cropper_swarm, extractor, full_model_types, model
 from backbone.routers.predictables import (
@@ -15,16 +21,26 @@ from backbone.routers.predictables import (
     players,
     rarity,
 )
-from backbone.routers.processes import backup, cropping, extraction, training
+from backbone.routers.processes import backup, cropping, extraction, jobs, training
 from backbone.routers.tags import HELPERS as HELP
 from backbone.routers.tags import OBJECTS as OBJ
 from backbone.routers.tags import PREDICTABLES as PRED
 from backbone.routers.tags import PROCESSES as PROC
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_jobs()
+    yield
+    stop_jobs()
+
+
 app = FastAPI(
     title="DBDIE API",
     summary="DBD Information Extraction API",
     description="Process your 💀 Dead By Daylight 💀 matches' endcards.",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # TODO
@@ -54,6 +70,7 @@ if True:
     app.include_router(training.router,   prefix=EP.TRAIN,   tags=[PROC])
     app.include_router(extraction.router, prefix=EP.EXTRACT, tags=[PROC])
     app.include_router(backup.router,     prefix=EP.BACKUP,  tags=[PROC])
+    app.include_router(jobs.router,       prefix=EP.JOBS,    tags=[PROC])
 
 
 # origins = ["*"]  # ! PLEASE DO NOT LEAVE THIS LIKE THIS IN A PRODUCTION ENV!
@@ -76,5 +93,16 @@ def health():
     return {"status": "OK"}
 
 
+@app.get("/health/db", summary="Database connection pools health check")
+def health_db():
+    """Usage and checkout statistics of the sync and async connection pools.
+    Useful to size the workers against the Postgres `max_connections`.
+    """
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+    }
+
+
 with open("app/ascii_art.txt") as f:
     print(f.read())
@@ -0,0 +1,99 @@
+"""Per-row serialization cost of the list endpoints, before and after the orjson fast path.
+
+'Before' is what FastAPI does with the rows returned by a route: validating them
+against the response_model and rendering them with the standard JSON encoder.
+'After' is the current code path, that builds an ORJSONResponse without validation.
+
+Run it with `make bench` (the models need the settings of the .env file).
+"""
+
+import asyncio
+import datetime as dt
+import timeit
+from collections import namedtuple
+
+from dbdie_classes.schemas.groupings import LabelsOut, MatchOut
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backbone.endpoints import fast_response
+from backbone.models.groupings import Labels, Match
+from backbone.sqla import object_as_dict
+
+N_ROWS = 1_000
+REPEATS = 5
+NUMBER = 10
+
+
+def fake_value(col, i: int):
+    """Plausible value for a column, based on its Python type."""
+    t = col.type.python_type
+    if t is bool:
+        return i % 2 == 0
+    elif t is int:
+        return i % 100
+    elif t is str:
+        return f"2024-05-01_{i:06d}.png"
+    elif t is dt.datetime:
+        return dt.datetime(2024, 5, 1, tzinfo=dt.timezone.utc)
+    elif t is dt.date:
+        return dt.date(2024, 5, 1)
+    raise ValueError(f"Unsupported column type: {t}")
+
+
+def fake_rows(model) -> list[dict]:
+    cols = list(model.__table__.columns)
+    return [{c.key: fake_value(c, i) for c in cols} for i in range(N_ROWS)]
+
+
+def fastapi_path(loop, schema, content) -> bytes:
+    """Serialize the returned content the way a route with a response_model does."""
+    field = create_model_field(name="Response", type_=list[schema], mode="serialization")
+    value = loop.run_until_complete(
+        serialize_response(field=field, response_content=content)
+    )
+    return JSONResponse(value).body
+
+
+def per_row_us(f) -> float:
+    best = min(timeit.repeat(f, repeat=REPEATS, number=NUMBER))
+    return 1e6 * best / (NUMBER * N_ROWS)
+
+
+def main() -> None:
+    loop = asyncio.new_event_loop()
+
+    matches = [Match(**row) for row in fake_rows(Match)]
+    LabelsRow = namedtuple("LabelsRow", [c.key for c in Labels.__table__.columns])
+    labels = [LabelsRow(**row) for row in fake_rows(Labels)]
+
+    cases = {
+        "/matches": (
+            lambda: fastapi_path(loop, MatchOut, matches),
+            lambda: fast_response(MatchOut, [object_as_dict(m) for m in matches]).body,
+        ),
+        "/labels/filter-many": (
+            lambda: fastapi_path(
+                loop,
+                LabelsOut,
+                [LabelsOut.from_labels(lbl) for lbl in labels],
+            ),
+            lambda: ORJSONResponse(
+                [LabelsOut.from_labels(lbl).model_dump() for lbl in labels]
+            ).body,
+        ),
+    }
+
+    print(f"{'endpoint':<22}{'before (us/row)':>17}{'after (us/row)':>16}{'speedup':>9}")
+    for endpoint, (before, after) in cases.items():
+        t_before, t_after = per_row_us(before), per_row_us(after)
+        print(
+            f"{endpoint:<22}{t_before:>17.2f}{t_after:>16.2f}{t_before / t_after:>8.1f}x"
+        )
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
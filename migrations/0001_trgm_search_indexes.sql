@@ -0,0 +1,14 @@
+-- Trigram GIN indexes for the text filters and the fuzzy search of names and filenames.
+-- Migrations must be idempotent, since `make migrate` applies all of them every time.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS addons_name_trgm_idx      ON "addons"      USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS character_name_trgm_idx   ON "character"   USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS dbd_version_name_trgm_idx ON "dbd_version" USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS item_name_trgm_idx        ON "item"        USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS offering_name_trgm_idx    ON "offering"    USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS perks_name_trgm_idx       ON "perks"       USING gin (lower(name) gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS status_name_trgm_idx      ON "status"      USING gin (lower(name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS matches_filename_trgm_idx ON "matches" USING gin (lower(filename) gin_trgm_ops);
@@ -0,0 +1,20 @@
+-- Persistent table of the background jobs (crop, extract, train and backup).
+-- Migrations must be idempotent, since `make migrate` applies all of them every time.
+
+CREATE TABLE IF NOT EXISTS "jobs" (
+    id               serial      PRIMARY KEY,
+    kind             varchar     NOT NULL,
+    status           varchar     NOT NULL,
+    worker           varchar     NOT NULL,
+    params           jsonb       NOT NULL DEFAULT '{}',
+    result           jsonb,
+    error            varchar,
+    cancel_requested boolean     NOT NULL DEFAULT false,
+    date_created     timestamptz NOT NULL DEFAULT now(),
+    date_started     timestamptz,
+    date_finished    timestamptz,
+    date_heartbeat   timestamptz NOT NULL DEFAULT now()
+);
+
+-- Heartbeats and recovery only look at the unfinished jobs
+CREATE INDEX IF NOT EXISTS jobs_unfinished_idx ON "jobs" (worker, date_heartbeat) WHERE status IN ('pending', 'running');
@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("dbdie_classes")
+
+from backbone.code.extract import chunk_preds  # noqa: E402
+
+
+def record(fmt: str, n: int, start: int = 0, items: bool = True) -> dict:
+    ids = list(range(start, start + n))
+    return {
+        "fmt": fmt,
+        "match_ids": ids,
+        "player_ids": [i % 5 for i in ids],
+        "item_ids": ids if items else None,
+        "preds": [10 * i for i in ids],
+    }
+
+
+def test_chunk_preds_sizes():
+    chunks = list(chunk_preds([record("perks__killer", 7)], 3))
+
+    assert [len(preds) for _, preds in chunks] == [3, 3, 1]
+    assert [preds[0] for _, preds in chunks] == [(0, 0, 0, 0), (3, 3, 3, 30), (6, 1, 6, 60)]
+
+
+def test_chunk_preds_buffers_across_records():
+    records = [record("perks__killer", 2), record("perks__killer", 2, start=2)]
+    chunks = list(chunk_preds(records, 3))
+
+    assert [len(preds) for _, preds in chunks] == [3, 1]
+    assert [p[0] for _, preds in chunks for p in preds] == [0, 1, 2, 3]
+
+
+def test_chunk_preds_keeps_fmts_apart():
+    records = [record("perks__killer", 2), record("status__surv", 2), record("perks__killer", 1, 2)]
+    chunks = list(chunk_preds(records, 3))
+
+    assert [(fmt, len(preds)) for fmt, preds in chunks] == [
+        ("perks__killer", 3),
+        ("status__surv", 2),
+    ]
+
+
+def test_chunk_preds_without_item_ids():
+    (_, preds), = chunk_preds([record("character__killer", 2, items=False)], 10)
+    assert preds == [(0, 0, None, 0), (1, 1, None, 10)]
+
+
+def test_chunk_preds_of_nothing():
+    assert list(chunk_preds([], 3)) == []
+    assert list(chunk_preds([record("perks__killer", 0)], 3)) == []
+
+
+def test_chunk_preds_needs_positive_size():
+    with pytest.raises(AssertionError):
+        list(chunk_preds([record("perks__killer", 1)], 0))
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("dbdie_classes")
+
+from backbone.code import icons  # noqa: E402
+from backbone.code.icons import atlas_paths, get_atlas_index  # noqa: E402
+
+ENDPOINT = "perks"
+
+
+def save_icon(fd, id: int, size: tuple[int, int], color: tuple) -> None:
+    Image.new("RGBA", size, color).save(os.path.join(fd, f"{id}.png"))
+
+
+@pytest.fixture
+def icons_fd(tmp_path, monkeypatch):
+    """Icons folder with 3 perk icons."""
+    monkeypatch.setattr(icons, "ICONS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(icons, "ATLAS_FD", str(tmp_path / ".atlas"))
+
+    fd = tmp_path / ENDPOINT
+    fd.mkdir()
+    save_icon(fd, 0, (4, 4), (255, 0, 0, 255))
+    save_icon(fd, 1, (4, 4), (0, 255, 0, 255))
+    save_icon(fd, 10, (2, 3), (0, 0, 255, 255))
+    (fd / "notes.txt").write_text("not an icon")
+    return fd
+
+
+def test_atlas_index(icons_fd):
+    index = get_atlas_index(ENDPOINT)
+
+    assert sorted(index["icons"]) == [0, 1, 10]
+    assert (index["width"], index["height"]) == (8, 8)
+    assert index["icons"][10] == {"x": 0, "y": 4, "w": 2, "h": 3}
+
+    img_path, _ = atlas_paths(ENDPOINT)
+    with Image.open(img_path) as atlas:
+        rect = index["icons"][1]
+        assert atlas.getpixel((rect["x"], rect["y"])) == (0, 255, 0, 255)
+
+
+def test_atlas_is_reused(icons_fd):
+    get_atlas_index(ENDPOINT)
+    img_path, _ = atlas_paths(ENDPOINT)
+    mtime_ns = os.stat(img_path).st_mtime_ns
+
+    index = get_atlas_index(ENDPOINT)
+    assert os.stat(img_path).st_mtime_ns == mtime_ns
+    assert sorted(index["icons"]) == ["0", "1", "10"]  # read back from the JSON index
+
+
+def test_atlas_is_rebuilt_on_change(icons_fd):
+    fingerprint = get_atlas_index(ENDPOINT)["fingerprint"]
+    save_icon(icons_fd, 11, (4, 4), (0, 0, 0, 255))
+
+    index = get_atlas_index(ENDPOINT)
+    assert index["fingerprint"] != fingerprint
+    assert sorted(index["icons"]) == [0, 1, 10, 11]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("dbdie_classes")
+
+from backbone.code.matches import (  # noqa: E402
+    RENDITION_WIDTHS,
+    downscale,
+    get_match_rendition,
+    rendition_width,
+)
+from backbone.exceptions import ValidationException  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "w, expected",
+    [
+        (1, 240),
+        (240, 240),
+        (241, 480),
+        (900, 960),
+        (5_000, 1_920),
+    ],
+)
+def test_rendition_width(w, expected):
+    assert rendition_width(w, 1_920) == expected
+
+
+def test_rendition_width_capped_at_source():
+    assert rendition_width(900, 500) == 500
+    assert rendition_width(RENDITION_WIDTHS[-1] + 1, 3_000) == 3_000
+
+
+def test_rendition_width_must_be_positive():
+    with pytest.raises(AssertionError):
+        rendition_width(0, 1_920)
+
+
+@pytest.mark.parametrize("w", [0, -240])
+def test_match_rendition_of_invalid_width(w):
+    with pytest.raises(ValidationException):
+        get_match_rendition("2024-05-01_000001.png", w, None)
+
+
+def test_downscale_averages_blocks():
+    arr = np.array(
+        [
+            [[0], [2], [10], [20]],
+            [[4], [6], [30], [40]],
+        ],
+        dtype=np.uint8,
+    )
+    out = downscale(arr, 2)
+
+    assert out.dtype == np.uint8
+    assert out.shape == (1, 2, 1)
+    assert out[..., 0].tolist() == [[3, 25]]
+
+
+def test_downscale_drops_partial_blocks():
+    arr = np.zeros((7, 10, 3), dtype=np.uint8)
+    assert downscale(arr, 3).shape == (2, 3, 3)
+
+
+def test_downscale_by_one_is_identity():
+    arr = np.random.default_rng(0).integers(0, 256, (4, 5, 3), dtype=np.uint8)
+    assert np.array_equal(downscale(arr, 1), arr)
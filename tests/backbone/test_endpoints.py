@@ -0,0 +1,90 @@
+import os
+from email.utils import formatdate
+
+from fastapi import Request
+import pytest
+
+pytest.importorskip("dbdie_classes")
+
+from backbone.endpoints import get_image, is_not_modified  # noqa: E402
+from backbone.exceptions import ItemNotFoundException  # noqa: E402
+
+MTIME = 1_700_000_000
+ETAG = '"abc-10"'
+
+
+def make_request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()
+            ],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, False),
+        ({"if_none_match": ETAG}, True),
+        ({"if_none_match": f"W/{ETAG}"}, True),
+        ({"if_none_match": f'"other", {ETAG}'}, True),
+        ({"if_none_match": "*"}, True),
+        ({"if_none_match": '"other"'}, False),
+        ({"if_modified_since": formatdate(MTIME, usegmt=True)}, True),
+        ({"if_modified_since": formatdate(MTIME - 1, usegmt=True)}, False),
+        ({"if_modified_since": "not a date"}, False),
+        # If-None-Match takes precedence
+        ({"if_none_match": '"other"', "if_modified_since": formatdate(MTIME, usegmt=True)}, False),
+    ],
+)
+def test_is_not_modified(headers, expected):
+    assert is_not_modified(make_request(**headers), ETAG, MTIME) == expected
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "1.png"
+    path.write_bytes(b"not really a png")
+    os.utime(path, (MTIME, MTIME))
+    return path
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_get_image(image, in_memory):
+    resp = get_image(1, image.name, "Perk", str(image.parent), in_memory=in_memory)
+
+    assert resp.status_code == 200
+    assert resp.headers["ETag"].startswith('"')
+    assert resp.headers["Last-Modified"] == formatdate(MTIME, usegmt=True)
+    assert resp.headers["Cache-Control"] == "no-cache"
+    if in_memory:
+        assert resp.body == b"not really a png"
+
+
+def test_get_image_not_modified(image):
+    etag = get_image(1, image.name, "Perk", str(image.parent)).headers["ETag"]
+    resp = get_image(
+        1,
+        image.name,
+        "Perk",
+        str(image.parent),
+        request=make_request(if_none_match=etag),
+    )
+
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+
+
+def test_get_image_changed(image):
+    etag = get_image(1, image.name, "Perk", str(image.parent)).headers["ETag"]
+    os.utime(image, (MTIME + 1, MTIME + 1))
+
+    assert get_image(1, image.name, "Perk", str(image.parent)).headers["ETag"] != etag
+
+
+def test_get_image_not_found(tmp_path):
+    with pytest.raises(ItemNotFoundException):
+        get_image(1, "1.png", "Perk", str(tmp_path))
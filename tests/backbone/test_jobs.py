@@ -0,0 +1,265 @@
+from fastapi import HTTPException
+import pytest
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backbone import jobs
+from backbone.exceptions import ValidationException
+from backbone.jobs import (
+    CANCELLED,
+    FAILED,
+    INTERRUPTED,
+    PENDING,
+    RUNNING,
+    SUCCEEDED,
+    WORKER,
+    cancel_job,
+    finish_job,
+    raise_if_cancelled,
+    register_job,
+    run_job,
+    submit_job,
+)
+from backbone.models.objects import Job
+
+JOBS_DDL = f"""
+CREATE TABLE {Job.__tablename__} (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    params JSON NOT NULL,
+    result JSON,
+    error TEXT,
+    cancel_requested BOOLEAN NOT NULL DEFAULT 0,
+    date_created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    date_started TIMESTAMP,
+    date_finished TIMESTAMP,
+    date_heartbeat TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@register_job("test-add")
+def run_add(db, a: int, b: int):
+    return {"sum": a + b}
+
+
+@register_job("test-fail")
+def run_fail(db):
+    raise ValueError("boom")
+
+
+@register_job("test-cancel")
+def run_cancel(db, id: int):
+    set_values(id, cancel_requested=True)
+    raise_if_cancelled()
+    raise AssertionError("The job should have been cancelled.")
+
+
+@register_job("test-taken-over")
+def run_taken_over(db, id: int):
+    set_values(id, status=INTERRUPTED)
+    return "done"
+
+
+@register_job("test-unencodable")
+def run_unencodable(db):
+    return object()
+
+
+@register_job("test-crop", interruptible=False)
+def run_uninterruptible(db):
+    pass
+
+
+SessionLocal = sessionmaker()
+
+
+def set_values(id: int, **values) -> None:
+    """Update a job from another session, as another request or process would."""
+    with SessionLocal() as db:
+        db.execute(update(Job).where(Job.id == id).values(**values))
+        db.commit()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Session on a SQLite database with the jobs table,
+    which the jobs module also uses for its own sessions.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(JOBS_DDL))
+    SessionLocal.configure(bind=engine)
+    monkeypatch.setattr(jobs, "SessionLocal", SessionLocal)
+
+    with SessionLocal() as session:
+        yield session
+    engine.dispose()
+
+
+def add_job(db, kind: str, params: dict | None = None, status: str = PENDING) -> Job:
+    job = Job(kind=kind, status=status, worker=WORKER, params=params or {})
+    db.add(job)
+    db.commit()
+    return job
+
+
+def get_job(db, id: int) -> Job:
+    db.expire_all()
+    return db.get(Job, id)
+
+
+# * run_job
+
+
+def test_run_job_succeeded(db):
+    id = add_job(db, "test-add", {"a": 1, "b": 2}).id
+    run_job(id)
+
+    job = get_job(db, id)
+    assert job.status == SUCCEEDED
+    assert job.result == {"sum": 3}
+    assert job.error is None
+    assert job.date_started is not None
+    assert job.date_finished is not None
+
+
+def test_run_job_failed(db):
+    id = add_job(db, "test-fail").id
+    run_job(id)
+
+    job = get_job(db, id)
+    assert job.status == FAILED
+    assert job.error == "ValueError: boom"
+    assert job.result is None
+
+
+def test_run_job_unencodable_result(db):
+    id = add_job(db, "test-unencodable").id
+    run_job(id)
+
+    job = get_job(db, id)
+    assert job.status == FAILED
+    assert job.error.startswith("ValueError: ")
+    assert job.result is None
+
+
+def test_run_job_cancelled(db):
+    job = add_job(db, "test-cancel")
+    job.params = {"id": job.id}
+    db.commit()
+    run_job(job.id)
+
+    assert get_job(db, job.id).status == CANCELLED
+
+
+@pytest.mark.parametrize("status", [CANCELLED, RUNNING])
+def test_run_job_not_claimed(db, status):
+    id = add_job(db, "test-fail", status=status).id
+    run_job(id)
+
+    job = get_job(db, id)
+    assert job.status == status
+    assert job.error is None
+
+
+def test_run_job_of_another_worker(db):
+    job = add_job(db, "test-fail")
+    job.worker = "other:1"
+    db.commit()
+    run_job(job.id)
+
+    assert get_job(db, job.id).status == PENDING
+
+
+def test_run_job_keeps_interrupted_status(db):
+    job = add_job(db, "test-taken-over")
+    job.params = {"id": job.id}
+    db.commit()
+    run_job(job.id)
+
+    job = get_job(db, job.id)
+    assert job.status == INTERRUPTED
+    assert job.result is None
+
+
+def test_finish_job_retries_once(db, monkeypatch):
+    id = add_job(db, "test-add", status=RUNNING).id
+    execute = db.execute
+    calls = []
+
+    def flaky_execute(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise OperationalError("UPDATE jobs", {}, Exception("connection lost"))
+        return execute(*args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", flaky_execute)
+    finish_job(db, id, SUCCEEDED, result=3)
+
+    assert len(calls) == 2
+    assert get_job(db, id).status == SUCCEEDED
+
+
+def test_raise_if_cancelled_outside_of_jobs(db):
+    raise_if_cancelled()
+
+
+# * cancel_job
+
+
+def test_cancel_pending_job(db):
+    job = cancel_job(db, add_job(db, "test-add", {"a": 1, "b": 2}))
+
+    assert job.status == CANCELLED
+    assert job.cancel_requested
+    assert job.date_finished is not None
+
+
+def test_cancel_running_job(db):
+    job = cancel_job(db, add_job(db, "test-add", status=RUNNING))
+
+    assert job.status == RUNNING
+    assert job.cancel_requested
+
+
+def test_cancel_running_uninterruptible_job(db):
+    job = add_job(db, "test-crop", status=RUNNING)
+    with pytest.raises(HTTPException) as exc:
+        cancel_job(db, job)
+
+    assert exc.value.status_code == 409
+    assert not get_job(db, job.id).cancel_requested
+
+
+@pytest.mark.parametrize("status", [SUCCEEDED, FAILED, CANCELLED, INTERRUPTED])
+def test_cancel_finished_job(db, status):
+    with pytest.raises(ValidationException):
+        cancel_job(db, add_job(db, "test-add", status=status))
+
+
+# * Lifecycle
+
+
+def test_submit_job_when_stopped(db):
+    with pytest.raises(HTTPException) as exc:
+        submit_job(db, "test-add", {"a": 1, "b": 2})
+
+    assert exc.value.status_code == 503
+    assert db.query(Job).count() == 0
+
+
+def test_submit_job_after_restart(db):
+    jobs.start_jobs()
+    jobs.stop_jobs()
+    jobs.start_jobs()
+    try:
+        job = submit_job(db, "test-add", {"a": 1, "b": 2})
+    finally:
+        jobs.stop_jobs()
+
+    assert job.worker == WORKER
+    assert get_job(db, job.id).status in [PENDING, RUNNING, SUCCEEDED]
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from backbone.sequences import _ensured, ensure_sequence, next_id, sync_sequence
+
+TEST_DB_URL = os.environ.get("DBDIE_TEST_DB_URL")
+
+
+class SeqTable:
+    __tablename__ = "dbdie_test_seq"
+
+
+@pytest.fixture
+def db():
+    """Session on a Postgres database ('DBDIE_TEST_DB_URL'),
+    with a table that already has the ids 0 to 4.
+    """
+    if TEST_DB_URL is None:
+        pytest.skip("DBDIE_TEST_DB_URL is not set")
+
+    engine = create_engine(TEST_DB_URL)
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{SeqTable.__tablename__}"'))
+        conn.execute(text(f'CREATE TABLE "{SeqTable.__tablename__}" (id int PRIMARY KEY)'))
+        conn.execute(
+            text(
+                f'INSERT INTO "{SeqTable.__tablename__}" (id) '
+                + "SELECT generate_series(0, 4)"
+            )
+        )
+    _ensured.clear()
+
+    with Session(engine) as session:
+        yield session
+
+    _ensured.clear()
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE "{SeqTable.__tablename__}"'))
+    engine.dispose()
+
+
+def test_ensure_sequence_starts_after_max_id(db):
+    ensure_sequence(db, SeqTable)
+    assert next_id(db, SeqTable) == 5
+
+
+def test_ensure_sequence_doesnt_go_back_after_restart(db):
+    ensure_sequence(db, SeqTable)
+    first = next_id(db, SeqTable)
+
+    _ensured.clear()  # as in a new process
+    ensure_sequence(db, SeqTable)
+    assert next_id(db, SeqTable) > first
+
+
+def test_sync_sequence_doesnt_skip_ids(db):
+    sync_sequence(db, SeqTable)
+    assert next_id(db, SeqTable) == 5
+
+
+def test_sync_sequence_after_manual_id(db):
+    assert next_id(db, SeqTable) == 5
+    db.execute(text(f'INSERT INTO "{SeqTable.__tablename__}" (id) VALUES (9)'))
+    sync_sequence(db, SeqTable)
+    assert next_id(db, SeqTable) == 10
@@ -0,0 +1,35 @@
+import base64
+
+import pytest
+
+from backbone.exceptions import ValidationException
+from backbone.sqla import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("keys", [(0,), (12,), (3, 7), (1, 2, 3)])
+def test_cursor_round_trip(keys):
+    assert decode_cursor(encode_cursor(*keys), len(keys)) == list(keys)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(2**40, 2**40 + 1)
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        base64.urlsafe_b64encode(b"{}").decode(),
+        base64.urlsafe_b64encode(b'["1"]').decode(),
+        base64.urlsafe_b64encode(b"[1.5]").decode(),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValidationException):
+        decode_cursor(cursor, 1)
+
+
+def test_cursor_with_other_number_of_keys():
+    with pytest.raises(ValidationException):
+        decode_cursor(encode_cursor(1, 2), 1)
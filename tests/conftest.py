@@ -0,0 +1,22 @@
+"""Shared pytest configuration."""
+
+import os
+import sys
+
+APP_FD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_FD)
+
+# Settings are read on import, so the tests don't need a .env file
+TEST_SETTINGS = {
+    "DBDIE_MAIN_FD": "/tmp/dbdie",
+    "FASTAPI_HOST": "127.0.0.1:8000",
+    "DB_HOSTNAME": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "dbdie",
+    "DB_USERNAME": "dbdie",
+    "DB_PASSWORD": "dbdie",
+    "ML_HOST": "127.0.0.1:8001",
+    "CHECK_RPS": "false",
+}
+for key, value in TEST_SETTINGS.items():
+    os.environ.setdefault(key, value)